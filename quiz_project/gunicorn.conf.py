@@ -0,0 +1,109 @@
+# Gunicorn configuration, picked up automatically from the working directory.
+# SERVER_MODE=asgi serves quiz_project.asgi through uvicorn workers (and turns
+# on the async quiz views); anything else keeps threaded WSGI workers.
+#
+# Every value below can be overridden with the environment variable named
+# next to it; the defaults size the server from the CPUs and memory the
+# container is actually allowed to use.
+import os
+
+server_mode = os.getenv('SERVER_MODE', 'wsgi')
+
+
+def _cpu_limit():
+    cpus = len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else os.cpu_count() or 1
+    try:
+        # cgroup v2 CPU quota, e.g. "200000 100000" for two cores.
+        with open('/sys/fs/cgroup/cpu.max') as cpu_max:
+            quota, period = cpu_max.read().split()
+        if quota != 'max':
+            cpus = min(cpus, max(1, int(quota) // int(period)))
+    except (OSError, ValueError):
+        pass
+    return cpus
+
+
+def _memory_limit_mb():
+    try:
+        with open('/sys/fs/cgroup/memory.max') as memory_max:
+            value = memory_max.read().strip()
+        if value != 'max':
+            return int(value) // (1024 * 1024)
+    except (OSError, ValueError):
+        pass
+    try:
+        with open('/proc/meminfo') as meminfo:
+            for line in meminfo:
+                if line.startswith('MemTotal:'):
+                    return int(line.split()[1]) // 1024
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def _worker_count():
+    if os.getenv('WEB_CONCURRENCY'):
+        return int(os.getenv('WEB_CONCURRENCY'))
+    cpus = _cpu_limit()
+    # Threaded WSGI workers spend most of a request waiting on the database,
+    # so they get the classic 2n+1; an event loop per core is enough for ASGI.
+    workers = cpus if server_mode == 'asgi' else cpus * 2 + 1
+    memory = _memory_limit_mb()
+    if memory:
+        per_worker = int(os.getenv('GUNICORN_WORKER_MEMORY_MB', 150))
+        workers = min(workers, max(1, memory // per_worker))
+    return max(1, workers)
+
+
+if server_mode == 'asgi':
+    wsgi_app = 'quiz_project.asgi:application'
+    worker_class = 'uvicorn_worker.UvicornWorker'
+else:
+    wsgi_app = 'quiz_project.wsgi:application'
+    worker_class = 'gthread'
+    threads = int(os.getenv('GUNICORN_THREADS', 4))
+
+workers = _worker_count()
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+
+# Load Django once in the master so workers fork with it (and the warm
+# caches) already in memory.
+preload_app = os.getenv('GUNICORN_PRELOAD', 'True') == 'True'
+
+# Recycle workers now and then so slow leaks cannot build up over an exam
+# day; the jitter keeps them from all restarting at once.
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', 2000))
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', 200))
+
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 30))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', 5))
+
+accesslog = os.getenv('GUNICORN_ACCESS_LOG', '-')
+
+
+def _warm_up(log):
+    from django.db import connections
+    from quiz_app.warmup import warm_up
+
+    try:
+        stats = warm_up()
+        log.info("Warmed up %(papers)d quiz papers and %(languages)d sidebars in %(seconds).2fs", stats)
+    except Exception:
+        log.exception("Warmup failed; workers will fill their caches on demand")
+    finally:
+        # Never share a database connection, or a pool of them, across fork().
+        connections.close_all()
+        for alias in connections:
+            if hasattr(connections[alias], 'close_pool'):
+                connections[alias].close_pool()
+
+
+def when_ready(server):
+    if server.cfg.preload_app:
+        _warm_up(server.log)
+
+
+def post_worker_init(worker):
+    if not worker.cfg.preload_app:
+        _warm_up(worker.log)
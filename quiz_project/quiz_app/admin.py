@@ -1,6 +1,117 @@
-from django.contrib import admin
+from django import forms
+from django.conf import settings
+from django.contrib import admin, messages
+from django.contrib.admin.views.main import PAGE_VAR
+from django.core.paginator import Paginator
+from django.db import DatabaseError, connections
+from django.db.models import Q
+from django.shortcuts import redirect, render
+from django.urls import path
+from django.utils import timezone
+from django.utils.functional import cached_property
 from django.utils.html import format_html
-from .models import Department, QuizSet, Question, Choice, QuizResult, UserAnswer
+from . import search
+from .bank import BANK_EXPORT_FORMATS, READERS, BankError, format_for, import_bank
+from .exports import download_response, stream_pdf_zip
+from .images import picture
+from .models import BackgroundJob, Department, QuizSet, Question, Choice, QuizResult, UserAnswer
+
+
+# Changelists of the big tables never count more than this many rows past
+# the start of the page being shown.
+COUNT_LIMIT = 10000
+
+
+def estimated_row_count(model, using='default'):
+    """The planner's row estimate for ``model``'s table, or None when there is none."""
+    connection = connections[using]
+    table = model._meta.db_table
+    try:
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute("SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass", [table])
+            elif connection.vendor == 'sqlite':
+                # Filled in by ANALYZE; the first number is the row count.
+                cursor.execute("SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1", [table])
+            else:
+                return None
+            row = cursor.fetchone()
+    except DatabaseError:
+        return None
+    if not row or row[0] is None:
+        return None
+    estimate = int(str(row[0]).split()[0])
+    return estimate if estimate >= 0 else None
+
+
+class AtLeast(int):
+    """A row count that stopped early; shown as "10000+"."""
+
+    def __str__(self):
+        return f'{int(self)}+'
+
+
+class EstimatedCountPaginator(Paginator):
+    """Avoids COUNT(*) over a whole large table on every changelist page.
+
+    An unfiltered list of a big table takes the planner's estimate; anything
+    else is counted up to COUNT_LIMIT rows past the start of the requested
+    page, so a broad filter stops counting early instead of scanning
+    everything it matches, while every page it reaches can still be opened.
+    """
+
+    def __init__(self, *args, page_number=1, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.page_number = page_number
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not queryset.query.where:
+            estimate = estimated_row_count(queryset.model, queryset.db)
+            if estimate is not None and estimate > COUNT_LIMIT:
+                return estimate
+        limit = (self.page_number - 1) * self.per_page + COUNT_LIMIT
+        count = queryset.order_by()[:limit + 1].count()
+        return AtLeast(limit) if count > limit else count
+
+
+class IndexedSearchMixin:
+    """Search by exact username or id, plus ``related_search()``, all answered from an index.
+
+    Replaces the default LIKE '%term%' across joined text columns, which has
+    to read every row of the table. ``search_fields`` only switches the search
+    box (and autocomplete) on; ``exact_fields`` are the ones matched exactly.
+    """
+    search_fields = ['user__username']
+    exact_fields = ['user__username']
+    search_help_text = "Exact username, or an id."
+
+    def related_search(self, term):
+        return Q()
+
+    def get_search_results(self, request, queryset, search_term):
+        term = search_term.strip()
+        if not term:
+            return queryset, False
+        query = self.related_search(term)
+        for field in self.exact_fields:
+            query |= Q(**{field: term})
+        if term.isdigit():
+            query |= Q(pk=int(term))
+        return queryset.filter(query), False
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    paginator = EstimatedCountPaginator
+    # Skip the second, unfiltered COUNT(*) behind "N results (M total)".
+    show_full_result_count = False
+
+    def get_paginator(self, request, queryset, per_page, orphans=0, allow_empty_first_page=True):
+        page = request.GET.get(PAGE_VAR, '')
+        return self.paginator(
+            queryset, per_page, orphans, allow_empty_first_page, page_number=int(page) if page.isdigit() else 1,
+        )
 
 
 class ChoiceInline(admin.TabularInline):
@@ -9,11 +120,21 @@ class ChoiceInline(admin.TabularInline):
 
 
 @admin.register(Question)
-class QuestionAdmin(admin.ModelAdmin):
+class QuestionAdmin(IndexedSearchMixin, admin.ModelAdmin):
     list_display = ['text', 'question_type', 'quiz_set', 'image_preview']
     list_filter = ['question_type', 'quiz_set']
+    list_select_related = ['quiz_set__department']
+    # A stable order, so changelist and autocomplete pages never skip or repeat rows.
+    ordering = ['id']
+    search_fields = ['text']
+    exact_fields = []
+    search_help_text = "Words from the question, or an id."
     readonly_fields = ['image_preview']
 
+    def related_search(self, term):
+        # Also answers the question autocomplete on the answers' change form.
+        return Q(pk__in=search.matching_ids('questions', term))
+
     def get_inlines(self, request, obj=None):
         if obj and obj.question_type == 'MCQ':
             return [ChoiceInline]
@@ -26,25 +147,133 @@ class QuestionAdmin(admin.ModelAdmin):
             obj.choices.all().delete()
 
     def image_preview(self, obj):
+        thumb = picture(obj.image_name, 'thumb') if obj.image_name else None
+        if thumb:
+            return format_html(
+                '<picture><source srcset="{}" type="image/webp">'
+                '<img src="{}" width="{}" height="{}" loading="lazy" decoding="async" alt="" /></picture>',
+                thumb['webp_url'], thumb['fallback_url'], thumb['width'], thumb['height'],
+            )
         if obj.image_name:
-            return format_html('<img src="{}" style="max-height: 100px;" />', obj.image_url())
+            return format_html('<img src="{}" style="max-height: 100px;" loading="lazy" />', obj.image_url())
         return "-"
     image_preview.short_description = "Image Preview"
 
 
 @admin.register(UserAnswer)
-class UserAnswerAdmin(admin.ModelAdmin):
-    list_display = ['user', 'question', 'selected_choice', 'written_answer']
-    list_filter = ['question__quiz_set', 'user']
-    search_fields = ['user__username', 'question__text']
+class UserAnswerAdmin(IndexedSearchMixin, LargeTableAdmin):
+    list_display = ['id', 'user', 'question', 'selected_choice', 'written_answer', 'grade', 'suggested_grade']
+    list_filter = ['question__quiz_set', ('grade', admin.EmptyFieldListFilter)]
+    list_select_related = ['user', 'question', 'selected_choice']
+    autocomplete_fields = ['user', 'question']
+    raw_id_fields = ['selected_choice', 'quiz_result']
+    search_help_text = "Exact username, an id, or words from the question."
+
+    def related_search(self, term):
+        # Matched in the questions' full-text index, then looked up by question.
+        return Q(question_id__in=search.matching_ids('questions', term))
 
 
 @admin.register(QuizResult)
-class QuizResultAdmin(admin.ModelAdmin):
+class QuizResultAdmin(IndexedSearchMixin, LargeTableAdmin):
     list_display = ['user', 'quiz', 'score', 'status', 'created_at']
-    list_filter = ['status', 'quiz', 'created_at']
-    search_fields = ['user__username', 'quiz__title']
+    list_filter = ['status', 'department', 'quiz']
+    list_select_related = ['user', 'quiz__department']
+    date_hierarchy = 'created_at'
+    autocomplete_fields = ['user', 'quiz']
+    search_help_text = "Exact username, an id, or part of the quiz title."
+    actions = ['download_pdfs_zip']
+
+    def related_search(self, term):
+        # QuizSet is small; the results are then found through their quiz index.
+        return Q(quiz__in=QuizSet.objects.filter(title__icontains=term))
+
+    @admin.action(description="Download PDFs of selected results as ZIP")
+    def download_pdfs_zip(self, request, queryset):
+        return download_response(
+            request,
+            stream_pdf_zip(queryset, workers=settings.PDF_EXPORT_WORKERS),
+            'application/zip',
+            f"results_{timezone.now():%Y%m%d_%H%M}.zip",
+        )
+
+
+@admin.register(BackgroundJob)
+class BackgroundJobAdmin(LargeTableAdmin):
+    list_display = ['kind', 'quiz_result', 'status', 'attempts', 'run_after', 'updated_at']
+    list_filter = ['kind', 'status']
+    list_select_related = ['quiz_result__user', 'quiz_result__quiz__department']
+    raw_id_fields = ['quiz_result']
+    readonly_fields = ['last_error']
+
+
+@admin.register(Department)
+class DepartmentAdmin(admin.ModelAdmin):
+    search_fields = ['name']
+
+
+class BankImportForm(forms.Form):
+    bank = forms.FileField(
+        label="Question bank",
+        help_text="CSV, JSON, JSON Lines or XLSX; see quiz_app/bank.py for the layout.",
+    )
+
+    def clean_bank(self):
+        bank = self.cleaned_data['bank']
+        if format_for(bank.name) is None:
+            raise forms.ValidationError(f"Upload a file ending in one of: {', '.join(sorted(READERS))}.")
+        return bank
+
+
+@admin.register(QuizSet)
+class QuizSetAdmin(admin.ModelAdmin):
+    list_display = ['title', 'department', 'single_page', 'sample_size', 'shuffle_questions']
+    list_select_related = ['department']
+    search_fields = ['title']
+    change_list_template = 'admin/quiz_app/quizset/change_list.html'
+    actions = ['export_bank_csv', 'export_bank_xlsx', 'export_bank_jsonl']
+
+    def get_urls(self):
+        return [
+            path('import/', self.admin_site.admin_view(self.import_bank_view), name='quiz_app_quizset_import'),
+        ] + super().get_urls()
+
+    def import_bank_view(self, request):
+        if not self.has_add_permission(request):
+            return redirect('admin:quiz_app_quizset_changelist')
+        form = BankImportForm(request.POST or None, request.FILES or None)
+        if request.method == 'POST' and form.is_valid():
+            bank = form.cleaned_data['bank']
+            try:
+                stats = import_bank(bank, format_for(bank.name))
+            except BankError as error:
+                form.add_error('bank', list(error.errors))
+            else:
+                self.message_user(request, (
+                    f"Imported {stats['questions']} questions and {stats['choices']} choices into "
+                    f"{stats['quizzes']} quizzes ({stats['skipped']} already present) at {stats['rate']:.0f} rows/s."
+                ), messages.SUCCESS)
+                return redirect('admin:quiz_app_quizset_changelist')
+        return render(request, 'admin/quiz_app/quizset/import_bank.html', {
+            **self.admin_site.each_context(request),
+            'opts': self.model._meta,
+            'title': "Import question bank",
+            'form': form,
+        })
+
+    def export_bank(self, request, queryset, bank_format):
+        content_type, stream = BANK_EXPORT_FORMATS[bank_format]
+        filename = f"questions_{timezone.now():%Y%m%d_%H%M}.{bank_format}"
+        return download_response(request, stream(queryset), content_type, filename)
+
+    @admin.action(description="Export question bank of selected quizzes (CSV)")
+    def export_bank_csv(self, request, queryset):
+        return self.export_bank(request, queryset, 'csv')
 
+    @admin.action(description="Export question bank of selected quizzes (XLSX)")
+    def export_bank_xlsx(self, request, queryset):
+        return self.export_bank(request, queryset, 'xlsx')
 
-admin.site.register(Department)
-admin.site.register(QuizSet)
+    @admin.action(description="Export question bank of selected quizzes (JSON Lines)")
+    def export_bank_jsonl(self, request, queryset):
+        return self.export_bank(request, queryset, 'jsonl')
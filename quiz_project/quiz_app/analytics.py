@@ -0,0 +1,171 @@
+import math
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, ExpressionWrapper, F, FloatField, Q, Sum
+from django.utils import timezone
+
+from .models import Question, QuestionStats, QuizResult, QuizResultSummary, QuizSet, QuizStats, UserAnswer
+
+QUESTION_STATS_FIELDS = [
+    'responses', 'percent_correct', 'discrimination', 'average_grade', 'graded_count',
+    'choice_counts', 'refreshed_at',
+]
+QUIZ_STATS_FIELDS = ['attempts', 'mean_score', 'percent_correct', 'average_grade', 'refreshed_at']
+
+
+def attempt_points(prefix=''):
+    """An attempt's total in points, the numerator of leaderboard.ATTEMPT_SCORE.
+
+    One per correct MCQ answer plus each written grade as a fraction of one.
+    """
+    return ExpressionWrapper(
+        F(f'{prefix}summary__mcq_correct') + F(f'{prefix}summary__written_graded_sum') / 100.0,
+        output_field=FloatField(),
+    )
+
+
+def point_biserial(n, n_correct, total_sum, total_sq_sum, correct_total_sum):
+    """Point-biserial correlation of an item with the rest of the test score.
+
+    Takes sufficient statistics only: the response count, how many were
+    correct, and the sums of the attempts' total scores, of their squares and
+    of the totals of the correct responders. The item's own point is taken
+    out of each total first, so an item does not correlate with itself.
+    None when every response was right, every one wrong, or all rest scores
+    are equal.
+    """
+    if n < 2 or n_correct in (0, n):
+        return None
+    # rest = total - c with c in {0, 1}: sum(c) = sum(c^2) = n_correct, sum(total * c) = correct_total_sum
+    rest_sum = total_sum - n_correct
+    rest_sq_sum = total_sq_sum - 2 * correct_total_sum + n_correct
+    correct_rest_sum = correct_total_sum - n_correct
+
+    variance = rest_sq_sum / n - (rest_sum / n) ** 2
+    if variance <= 0:
+        return None
+    mean_correct = correct_rest_sum / n_correct
+    mean_wrong = (rest_sum - correct_rest_sum) / (n - n_correct)
+    p = n_correct / n
+    return (mean_correct - mean_wrong) / math.sqrt(variance) * math.sqrt(p * (1 - p))
+
+
+def _percent(part, whole):
+    return part * 100 / whole if whole else None
+
+
+def refresh_quiz(quiz_id):
+    """Rebuild the item statistics of one quiz from its finished attempts.
+
+    Two grouped queries over the quiz's answers supply everything: one row of
+    counts and score sums per question and one pick count per chosen choice.
+    This is a full rebuild, not an incremental update; stale_quiz_ids()
+    throttles how often a busy quiz pays for one.
+    """
+    refreshed_at = timezone.now()
+    results = QuizResult.objects.filter(quiz_id=quiz_id, end_time__isnull=False)
+    answers = UserAnswer.objects.filter(quiz_result__in=results)
+    correct = Q(selected_choice__is_correct=True)
+
+    total = attempt_points('quiz_result__')
+    per_question = {
+        row['question_id']: row
+        for row in answers.values('question_id').order_by().annotate(
+            responses=Count('id'),
+            correct=Count('id', filter=correct),
+            total_sum=Sum(total),
+            total_sq_sum=Sum(ExpressionWrapper(total * total, output_field=FloatField())),
+            correct_total_sum=Sum(total, filter=correct),
+            graded=Count('grade'),
+            grade_sum=Sum('grade'),
+        )
+    }
+    picks = {}
+    for question_id, choice_id, count in (
+        answers.filter(selected_choice__isnull=False).values_list('question_id', 'selected_choice_id')
+        .order_by().annotate(picks=Count('id'))
+    ):
+        picks.setdefault(question_id, {})[str(choice_id)] = count
+
+    question_stats = []
+    mcq_responses = mcq_correct = graded = grade_sum = 0
+    for question_id, question_type in Question.objects.filter(quiz_set_id=quiz_id).values_list('id', 'question_type'):
+        row = per_question.get(question_id, {})
+        stats = QuestionStats(
+            question_id=question_id,
+            responses=row.get('responses', 0),
+            graded_count=row.get('graded', 0),
+            choice_counts=picks.get(question_id, {}),
+            refreshed_at=refreshed_at,
+        )
+        if question_type == 'MCQ' and stats.responses:
+            stats.percent_correct = _percent(row['correct'], stats.responses)
+            stats.discrimination = point_biserial(
+                stats.responses, row['correct'], row['total_sum'] or 0,
+                row['total_sq_sum'] or 0, row['correct_total_sum'] or 0,
+            )
+            mcq_responses += stats.responses
+            mcq_correct += row['correct']
+        elif question_type == 'TEXT' and stats.graded_count:
+            stats.average_grade = row['grade_sum'] / stats.graded_count
+            graded += stats.graded_count
+            grade_sum += row['grade_sum']
+        question_stats.append(stats)
+
+    totals = results.aggregate(attempts=Count('id'), score_sum=Sum(attempt_points()))
+    quiz_stats = QuizStats(
+        quiz_id=quiz_id,
+        attempts=totals['attempts'],
+        mean_score=totals['score_sum'] / totals['attempts'] if totals['attempts'] else None,
+        percent_correct=_percent(mcq_correct, mcq_responses),
+        average_grade=grade_sum / graded if graded else None,
+        refreshed_at=refreshed_at,
+    )
+
+    with transaction.atomic():
+        QuestionStats.objects.bulk_create(
+            question_stats, update_conflicts=True, unique_fields=['question'], update_fields=QUESTION_STATS_FIELDS,
+        )
+        QuizStats.objects.bulk_create(
+            [quiz_stats], update_conflicts=True, unique_fields=['quiz'], update_fields=QUIZ_STATS_FIELDS,
+        )
+    return quiz_stats
+
+
+def stale_quiz_ids(throttle=True):
+    """Quizzes with attempts finished, answered or graded since their statistics were built.
+
+    Each check is an index range scan over what changed after the quiz's
+    last refresh, so a quiz costs two counts however busy it is. With
+    ``throttle`` a quiz that already has statistics waits until its changes
+    reach ITEM_STATS_MIN_CHANGE of its attempts or its statistics are
+    ITEM_STATS_MAX_AGE old, so a busy quiz is not rebuilt on every tick.
+    """
+    stale = []
+    max_age = timezone.now() - timedelta(seconds=settings.ITEM_STATS_MAX_AGE)
+    for quiz_id, refreshed_at, attempts in QuizSet.objects.values_list('id', 'stats__refreshed_at', 'stats__attempts'):
+        if refreshed_at is None:
+            stale.append(quiz_id)
+            continue
+        changed = QuizResult.objects.filter(quiz_id=quiz_id, end_time__gt=refreshed_at).count()
+        changed += QuizResultSummary.objects.filter(
+            updated_at__gt=refreshed_at, quiz_result__quiz_id=quiz_id, quiz_result__end_time__lte=refreshed_at,
+        ).count()
+        if not changed:
+            continue
+        if (
+            not throttle or not attempts or refreshed_at < max_age
+            or changed >= attempts * settings.ITEM_STATS_MIN_CHANGE
+        ):
+            stale.append(quiz_id)
+    return stale
+
+
+def refresh_item_stats(quiz_ids=None, throttle=True):
+    """Refresh the given quizzes, or every stale one; returns the ids refreshed."""
+    quiz_ids = stale_quiz_ids(throttle) if quiz_ids is None else quiz_ids
+    for quiz_id in quiz_ids:
+        refresh_quiz(quiz_id)
+    return quiz_ids
@@ -0,0 +1,96 @@
+"""Async versions of the candidate hot path, used when ASYNC_QUIZ_VIEWS is on.
+
+They share their logic with the sync views in views.py and only differ in
+how they wait: ORM reads use the async API, while template rendering and the
+answer transaction (which fires the summary signals) run in a worker thread.
+"""
+from asgiref.sync import sync_to_async
+from django.contrib import messages
+from django.contrib.auth.decorators import login_required
+from django.http import Http404
+from django.shortcuts import aget_object_or_404, redirect, render
+from django.utils.translation import gettext_lazy as _
+
+from .jobs import AUTOGRADE, UPDATE_LEADERBOARD, enqueue_job
+from .models import Department, QuizResult, QuizSet
+from .papers import get_paper_or_404
+from .views import (
+    advance_attempt, finish_attempt, next_page, parse_answer, question_context, result_context, resume_attempt,
+)
+
+arender = sync_to_async(render)
+aget_paper_or_404 = sync_to_async(get_paper_or_404)
+aadvance_attempt = sync_to_async(advance_attempt)
+aenqueue_job = sync_to_async(enqueue_job)
+
+
+async def aattempt_progress(attempt):
+    progress = await attempt.values_list('answered_count', 'question_order').afirst()
+    if progress is None:
+        raise Http404("No quiz attempt in progress.")
+    return progress
+
+
+@login_required
+async def quiz_question(request, quiz_id, question_number):
+    paper = await aget_paper_or_404(quiz_id)
+    user = await request.auser()
+    result_id = await request.session.aget(f'quiz_{quiz_id}_result_id')
+    attempt = QuizResult.objects.filter(id=result_id, user=user)
+    answered_count, question_order = await aattempt_progress(attempt)
+
+    quiz = paper.for_attempt(question_order)
+    question = quiz.question(question_number)
+
+    if question is None:
+        return redirect('dashboard')
+
+    if answered_count != question_number - 1:
+        return resume_attempt(quiz, answered_count)
+
+    if request.method == 'POST':
+        answer, correct, error_message = parse_answer(request.POST, question, user, result_id)
+        if error_message:
+            return await arender(
+                request, 'quiz_question.html', question_context(quiz, question, question_number, error_message)
+            )
+        if not await aadvance_attempt(attempt, question_number, answer, correct):
+            return resume_attempt(quiz, (await aattempt_progress(attempt))[0])
+        return next_page(quiz, question_number)
+
+    return await arender(request, 'quiz_question.html', question_context(quiz, question, question_number))
+
+
+@login_required
+async def quiz_result(request, quiz_id):
+    paper = await aget_paper_or_404(quiz_id)
+    result_id = await request.session.aget(f'quiz_{quiz_id}_result_id')
+
+    if not result_id:
+        messages.error(request, _("Session expired or invalid access. Please retake the quiz."))
+        return redirect('dashboard')
+
+    user = await request.auser()
+    result = await aget_object_or_404(QuizResult.objects.select_related('summary'), id=result_id, user=user)
+    quiz = paper.for_attempt(result.question_order)
+
+    update_fields = finish_attempt(result, quiz.total_questions)
+    if update_fields:
+        await result.asave(update_fields=update_fields)
+        await aenqueue_job(UPDATE_LEADERBOARD, result.id)
+        if quiz.written_total:
+            await aenqueue_job(AUTOGRADE, result.id)
+
+    if request.method == "POST" or request.GET.get("final", "") == "true":
+        await request.session.apop(f'quiz_{quiz_id}_result_id', None)
+
+    return await arender(request, 'quiz_result.html', result_context(quiz, result))
+
+
+@login_required
+async def department_quizzes(request, department_id):
+    department = await aget_object_or_404(Department, id=department_id)
+    quizzes = [quiz async for quiz in QuizSet.objects.filter(department=department)]
+    return await arender(request, 'department_quizzes.html', {
+        'department': department, 'quizzes': quizzes
+    })
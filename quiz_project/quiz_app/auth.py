@@ -0,0 +1,20 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+
+from . import sidebar
+
+
+class SidebarVersionBackend(ModelBackend):
+    """ModelBackend that loads the sidebar version with the session's user.
+
+    Every logged-in request reads the user anyway, so the version costs no
+    query of its own; context_processors.department_list picks it up.
+    """
+
+    def get_user(self, user_id):
+        UserModel = get_user_model()
+        try:
+            user = UserModel._default_manager.annotate(sidebar_version=sidebar.version_subquery()).get(pk=user_id)
+        except UserModel.DoesNotExist:
+            return None
+        return user if self.user_can_authenticate(user) else None
@@ -0,0 +1,112 @@
+import math
+import re
+from collections import Counter
+
+from .models import Question, UserAnswer
+
+# A suggestion blends how close the answer is to the reference answer with
+# how many of the keywords it mentions; with only one of the two set on the
+# question, that one decides alone.
+SIMILARITY_WEIGHT = 0.6
+KEYWORD_WEIGHT = 0.4
+
+# Cosine similarity of character trigrams rarely reaches 1 even for a good
+# paraphrase and rarely drops to 0 between two answers in the same language,
+# so the suggestion scales between these two points.
+SIMILARITY_FLOOR = 0.2
+SIMILARITY_CEILING = 0.8
+
+# Keywords match on a shared prefix, which absorbs most Russian and Uzbek
+# inflection ("маршрутизатор", "маршрутизатора") without a stemmer.
+STEM_LENGTH = 6
+
+BATCH_SIZE = 500
+
+_WORD = re.compile(r'\w+')
+
+
+def tokens(text):
+    return _WORD.findall(text.lower())
+
+
+def _stem(token):
+    return token[:STEM_LENGTH]
+
+
+def term_vector(text):
+    """Unit-length vector of the character trigrams of every word in ``text``."""
+    counts = Counter()
+    for token in tokens(text):
+        padded = f' {token} '
+        counts.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    norm = math.sqrt(sum(count * count for count in counts.values()))
+    return {gram: count / norm for gram, count in counts.items()} if norm else {}
+
+
+def cosine(vector, other):
+    if len(other) < len(vector):
+        vector, other = other, vector
+    return sum(weight * other.get(gram, 0.0) for gram, weight in vector.items())
+
+
+def parse_keywords(keywords):
+    """Each comma-separated keyword as a tuple of stems; a phrase needs all of them."""
+    parsed = []
+    for keyword in keywords.split(','):
+        stems = tuple(_stem(token) for token in tokens(keyword))
+        if stems:
+            parsed.append(stems)
+    return parsed
+
+
+class Scorer:
+    """The precomputed reference vector and keywords of one question."""
+
+    def __init__(self, reference_answer, keywords):
+        self.reference = term_vector(reference_answer) if reference_answer else {}
+        self.keywords = parse_keywords(keywords)
+
+    @property
+    def usable(self):
+        return bool(self.reference or self.keywords)
+
+    def score(self, answer_text):
+        """Suggested grade (0-100) for ``answer_text``, or None when there is nothing to compare with."""
+        if not self.usable:
+            return None
+        parts = []
+        if self.reference:
+            similarity = cosine(term_vector(answer_text), self.reference)
+            scaled = (similarity - SIMILARITY_FLOOR) / (SIMILARITY_CEILING - SIMILARITY_FLOOR)
+            parts.append((SIMILARITY_WEIGHT, min(max(scaled, 0.0), 1.0)))
+        if self.keywords:
+            stems = {_stem(token) for token in tokens(answer_text)}
+            found = sum(all(stem in stems for stem in keyword) for keyword in self.keywords)
+            parts.append((KEYWORD_WEIGHT, found / len(self.keywords)))
+        total_weight = sum(weight for weight, _ in parts)
+        return round(100 * sum(weight * value for weight, value in parts) / total_weight)
+
+
+def suggest_grades(answers):
+    """Store a suggested grade on every written answer in ``answers`` (a UserAnswer queryset).
+
+    Builds each question's scorer once and walks the answers in id order, one
+    batch at a time, writing each batch back with a single bulk_update.
+    Returns how many answers got a suggestion.
+    """
+    answers = answers.filter(question__question_type='TEXT').only('id', 'question_id', 'written_answer').order_by('id')
+    scorers = {}
+    suggested = 0
+    last_id = 0
+    while True:
+        batch = list(answers.filter(id__gt=last_id)[:BATCH_SIZE])
+        if not batch:
+            return suggested
+        missing = {answer.question_id for answer in batch} - scorers.keys()
+        for question in Question.objects.filter(pk__in=missing).only('reference_answer', 'keywords'):
+            scorers[question.pk] = Scorer(question.reference_answer, question.keywords)
+        for answer in batch:
+            answer.suggested_grade = scorers[answer.question_id].score(answer.written_answer)
+        UserAnswer.objects.bulk_update(batch, ['suggested_grade'])
+        suggested += sum(answer.suggested_grade is not None for answer in batch)
+        last_id = batch[-1].id
@@ -0,0 +1,467 @@
+"""Question bank import and export.
+
+A bank is a stream of questions, each naming its department and quiz. In
+CSV and XLSX files every question is one row under this header:
+
+    Department, Test Title, Question, Type, Image, Reference Answer, Keywords, Correct, Choice 1, Choice 2, ...
+
+with as many "Choice N" columns as needed and "Correct" listing the
+numbers of the right choices ("2" or "1,3"). JSON (an array) and JSON
+Lines files hold one object per question:
+
+    {"department": "...", "quiz": "...", "text": "...", "type": "MCQ", "image": "",
+     "reference_answer": "", "keywords": "", "choices": [{"text": "...", "is_correct": true}]}
+
+Every reader streams its file, so a bank is never held in memory whole.
+"""
+import csv
+import io
+import json
+import logging
+import re
+import time
+import zipfile
+from xml.etree import ElementTree
+
+from django.db import transaction
+from django.db.models import Count, Max, Prefetch
+
+from . import papers, scoring
+from .exports import CHUNK_SIZE, ROWS_PER_CHUNK, stream_csv, stream_xlsx
+from .images import image_names
+from .models import Choice, Department, Question, QuizSet
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 500
+# Validation stops collecting messages after this many bad rows.
+MAX_ERRORS = 50
+JSON_READ_SIZE = 64 * 1024
+
+# (tabular header, record key)
+COLUMNS = [
+    ('Department', 'department'),
+    ('Test Title', 'quiz'),
+    ('Question', 'text'),
+    ('Type', 'type'),
+    ('Image', 'image'),
+    ('Reference Answer', 'reference_answer'),
+    ('Keywords', 'keywords'),
+    ('Correct', 'correct'),
+]
+_CHOICE_HEADER = re.compile(r'Choice (\d+)$', re.IGNORECASE)
+
+
+class BankError(ValueError):
+    """A bank that cannot be imported; ``errors`` lists every problem found."""
+
+    def __init__(self, errors):
+        self.errors = errors
+        super().__init__('; '.join(errors[:5]) + (f" (and {len(errors) - 5} more)" if len(errors) > 5 else ''))
+
+
+# ----------------- Readers -----------------
+# Each yields (row number, record) pairs; the row number is what a person
+# looking at the file would call the row.
+
+def _tabular_records(rows):
+    header = None
+    for number, values in rows:
+        values = [str(value).strip() for value in values]
+        if header is None:
+            header = values
+            continue
+        if not any(values):
+            continue
+        cells = dict(zip(header, values))
+        record = {key: cells.get(title, '') for title, key in COLUMNS}
+        numbered = sorted(
+            (int(match.group(1)), value)
+            for title, value in cells.items()
+            if (match := _CHOICE_HEADER.match(title)) and value
+        )
+        correct = {part.strip() for part in record['correct'].split(',') if part.strip()}
+        record['choices'] = [{'text': text, 'is_correct': str(n) in correct} for n, text in numbered]
+        record['unknown_correct'] = sorted(correct - {str(n) for n, _ in numbered})
+        yield number, record
+
+
+def read_csv(file):
+    text = io.TextIOWrapper(file, encoding='utf-8-sig', newline='')
+    try:
+        yield from _tabular_records(enumerate(csv.reader(text), start=1))
+    finally:
+        # Keep the wrapper from closing the file, which the second pass rereads.
+        text.detach()
+
+
+def read_jsonl(file):
+    text = io.TextIOWrapper(file, encoding='utf-8-sig')
+    try:
+        for number, line in enumerate(text, start=1):
+            if line.strip():
+                yield number, json.loads(line)
+    finally:
+        text.detach()
+
+
+def read_json(file):
+    """Items of a top-level JSON array, decoded one at a time as the file is read."""
+    text = io.TextIOWrapper(file, encoding='utf-8-sig')
+    decoder = json.JSONDecoder()
+    buffer, done = '', False
+
+    def more():
+        nonlocal buffer, done
+        chunk = text.read(JSON_READ_SIZE)
+        done = not chunk
+        buffer += chunk
+
+    try:
+        while not buffer.strip() and not done:
+            more()
+        buffer = buffer.lstrip()
+        if not buffer.startswith('['):
+            raise ValueError("a JSON bank must be an array of questions")
+        buffer = buffer[1:]
+        number = 0
+        while True:
+            buffer = buffer.lstrip().lstrip(',').lstrip()
+            if buffer.startswith(']'):
+                return
+            try:
+                item, end = decoder.raw_decode(buffer)
+            except json.JSONDecodeError:
+                if done:
+                    raise
+                more()
+                continue
+            number += 1
+            buffer = buffer[end:]
+            yield number, item
+    finally:
+        text.detach()
+
+
+_MAIN = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+_RELATIONSHIP = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}id'
+_PACKAGE_RELS = '{http://schemas.openxmlformats.org/package/2006/relationships}'
+
+
+def _first_sheet_path(archive):
+    workbook = ElementTree.fromstring(archive.read('xl/workbook.xml'))
+    sheet = workbook.find(f'{_MAIN}sheets/{_MAIN}sheet')
+    if sheet is None:
+        raise ValueError("the workbook has no sheets")
+    rels = ElementTree.fromstring(archive.read('xl/_rels/workbook.xml.rels'))
+    for rel in rels.iter(f'{_PACKAGE_RELS}Relationship'):
+        if rel.get('Id') == sheet.get(_RELATIONSHIP):
+            target = rel.get('Target')
+            return target.lstrip('/') if target.startswith('/') else f'xl/{target}'
+    raise ValueError("the workbook's first sheet is missing")
+
+
+def _each(part, tag):
+    """Yield every complete ``tag`` element of an XML part, dropping it once the caller moves on.
+
+    Clearing the element alone would still leave an empty shell of it in
+    its parent for every row read, so the parent is cleared instead.
+    """
+    open_elements = []
+    for event, element in ElementTree.iterparse(part, events=('start', 'end')):
+        if event == 'start':
+            open_elements.append(element)
+            continue
+        open_elements.pop()
+        if element.tag == tag:
+            yield element
+            open_elements[-1].clear()
+
+
+def _shared_strings(archive):
+    if 'xl/sharedStrings.xml' not in archive.namelist():
+        return []
+    with archive.open('xl/sharedStrings.xml') as part:
+        return [''.join(t.text or '' for t in item.iter(f'{_MAIN}t')) for item in _each(part, f'{_MAIN}si')]
+
+
+def _column_number(reference):
+    number = 0
+    for letter in reference:
+        if not letter.isalpha():
+            break
+        number = number * 26 + ord(letter.upper()) - ord('A') + 1
+    return number - 1
+
+
+def _xlsx_value(cell, strings):
+    kind = cell.get('t')
+    if kind == 'inlineStr':
+        return ''.join(t.text or '' for t in cell.iter(f'{_MAIN}t'))
+    value = cell.findtext(f'{_MAIN}v') or ''
+    if kind == 's':
+        return strings[int(value)]
+    if kind in (None, 'n') and value.endswith('.0'):
+        # Whole numbers typed into a cell ("2" in Correct) come back as floats.
+        return value[:-2]
+    return value
+
+
+def _xlsx_rows(file):
+    with zipfile.ZipFile(file) as archive:
+        strings = _shared_strings(archive)
+        with archive.open(_first_sheet_path(archive)) as part:
+            for count, row in enumerate(_each(part, f'{_MAIN}row'), start=1):
+                values = {}
+                for position, cell in enumerate(row.iter(f'{_MAIN}c')):
+                    column = _column_number(cell.get('r')) if cell.get('r') else position
+                    values[column] = _xlsx_value(cell, strings)
+                number = int(row.get('r') or count)
+                yield number, [values.get(column, '') for column in range(max(values, default=-1) + 1)]
+
+
+def read_xlsx(file):
+    """Rows of the workbook's first sheet, parsed element by element."""
+    yield from _tabular_records(_xlsx_rows(file))
+
+
+READERS = {
+    'csv': read_csv,
+    'json': read_json,
+    'jsonl': read_jsonl,
+    'xlsx': read_xlsx,
+}
+
+
+def format_for(filename):
+    """The bank format a file name's extension implies, or None."""
+    extension = filename.rsplit('.', 1)[-1].lower()
+    extension = {'ndjson': 'jsonl'}.get(extension, extension)
+    return extension if extension in READERS else None
+
+
+def read_bank(file, bank_format):
+    """(row number, record) for every question in ``file``, read from its start."""
+    file.seek(0)
+    try:
+        yield from READERS[bank_format](file)
+    except BankError:
+        raise
+    except (ValueError, KeyError, IndexError, zipfile.BadZipFile, ElementTree.ParseError) as error:
+        raise BankError([f"Not a readable {bank_format.upper()} bank: {error}"])
+
+
+# ----------------- Validation -----------------
+def _flag(value):
+    if isinstance(value, str):
+        return value.strip().lower() in ('1', 'true', 'yes', 'y')
+    return bool(value)
+
+
+def _text(record, key):
+    value = record.get(key)
+    return '' if value is None else str(value).strip()
+
+
+def clean_record(record, known_images):
+    """The record ready for import, or ValueError naming everything wrong with it."""
+    if not isinstance(record, dict):
+        raise ValueError("expected an object")
+    problems = []
+    clean = {key: _text(record, key) for key in ('department', 'quiz', 'text', 'image', 'reference_answer', 'keywords')}
+    clean['type'] = _text(record, 'type').upper() or 'MCQ'
+    for key, label, limit in (('department', 'Department', 100), ('quiz', 'Test Title', 100), ('text', 'Question', None)):
+        if not clean[key]:
+            problems.append(f"{label} is required")
+        elif limit and len(clean[key]) > limit:
+            problems.append(f"{label} is longer than {limit} characters")
+    if len(clean['keywords']) > 500:
+        problems.append("Keywords are longer than 500 characters")
+    if clean['image'] and clean['image'] not in known_images:
+        problems.append(f"unknown image {clean['image']!r}")
+
+    choices = record.get('choices') or []
+    if not isinstance(choices, list):
+        choices = []
+        problems.append("choices must be a list")
+    clean['choices'] = [
+        (_text(choice, 'text'), _flag(choice.get('is_correct'))) if isinstance(choice, dict) else (str(choice).strip(), False)
+        for choice in choices
+    ]
+    if record.get('unknown_correct'):
+        problems.append(f"Correct names missing choice(s) {', '.join(record['unknown_correct'])}")
+    if clean['type'] == 'MCQ':
+        if len(clean['choices']) < 2:
+            problems.append("a multiple choice question needs at least two choices")
+        if not any(is_correct for _, is_correct in clean['choices']):
+            problems.append("no choice is marked correct")
+        if any(not text or len(text) > 255 for text, _ in clean['choices']):
+            problems.append("choice texts must be 1 to 255 characters")
+    elif clean['type'] == 'TEXT':
+        if clean['choices']:
+            problems.append("a written question cannot have choices")
+    else:
+        problems.append(f"Type must be MCQ or TEXT, not {clean['type']!r}")
+
+    if problems:
+        raise ValueError('; '.join(problems))
+    return clean
+
+
+def validate_bank(file, bank_format):
+    """First pass: check every row without writing anything; returns the row count."""
+    known_images = set(image_names())
+    errors = []
+    invalid = rows = 0
+    for number, record in read_bank(file, bank_format):
+        rows += 1
+        try:
+            clean_record(record, known_images)
+        except ValueError as error:
+            invalid += 1
+            if len(errors) < MAX_ERRORS:
+                errors.append(f"Row {number}: {error}")
+    if invalid > len(errors):
+        errors.append(f"{invalid - len(errors)} more invalid rows not shown")
+    if not rows:
+        errors.append("The file holds no questions.")
+    if errors:
+        raise BankError(errors)
+    return rows
+
+
+# ----------------- Import -----------------
+def _quiz_for(department_name, title):
+    """The quiz a bank row names, created (with its department) when missing, and its question texts."""
+    department = Department.objects.filter(name=department_name).order_by('id').first()
+    if department is None:
+        department = Department.objects.create(name=department_name)
+    quiz = QuizSet.objects.filter(department=department, title=title).order_by('id').first()
+    if quiz is None:
+        quiz = QuizSet.objects.create(department=department, title=title)
+    return quiz.id, set(quiz.questions.values_list('text', flat=True))
+
+
+def _insert(batch):
+    questions = Question.objects.bulk_create([question for question, _ in batch])
+    Choice.objects.bulk_create(
+        [
+            Choice(question=question, text=text, is_correct=is_correct)
+            for question, choices in zip(questions, (choices for _, choices in batch))
+            for text, is_correct in choices
+        ],
+        batch_size=BATCH_SIZE,
+    )
+    return sum(len(choices) for _, choices in batch)
+
+
+def import_bank(file, bank_format, batch_size=BATCH_SIZE, dry_run=False):
+    """Validate ``file`` in full, then add its questions in one transaction.
+
+    ``file`` is a binary file object that can seek, since the second pass
+    reads it again. Questions whose exact text is already in their quiz are
+    skipped, so importing the same bank twice adds nothing. Raises BankError
+    before writing anything if any row is invalid.
+    """
+    started = time.perf_counter()
+    rows = validate_bank(file, bank_format)
+    stats = {'rows': rows, 'questions': 0, 'choices': 0, 'skipped': 0, 'quizzes': 0}
+    if not dry_run:
+        known_images = set(image_names())
+        quizzes = {}
+        batch = []
+        with transaction.atomic():
+            for _, record in read_bank(file, bank_format):
+                record = clean_record(record, known_images)
+                key = (record['department'], record['quiz'])
+                if key not in quizzes:
+                    quizzes[key] = _quiz_for(*key)
+                quiz_id, texts = quizzes[key]
+                if record['text'] in texts:
+                    stats['skipped'] += 1
+                    continue
+                texts.add(record['text'])
+                batch.append((Question(
+                    quiz_set_id=quiz_id, text=record['text'], question_type=record['type'],
+                    image_name=record['image'] or None, reference_answer=record['reference_answer'],
+                    keywords=record['keywords'],
+                ), record['choices'] if record['type'] == 'MCQ' else []))
+                if len(batch) >= batch_size:
+                    stats['choices'] += _insert(batch)
+                    stats['questions'] += len(batch)
+                    batch = []
+            if batch:
+                stats['choices'] += _insert(batch)
+                stats['questions'] += len(batch)
+        # bulk_create sends no post_save, so do what the Question and Choice
+        # signals would have: drop cached papers and recount summaries.
+        for quiz_id, _ in quizzes.values():
+            papers.bump_version(quiz_id)
+            scoring.refresh_quiz_summaries(quiz_id)
+        stats['quizzes'] = len(quizzes)
+
+    stats['elapsed'] = time.perf_counter() - started
+    stats['rate'] = rows / stats['elapsed'] if stats['elapsed'] else 0.0
+    if not dry_run:
+        logger.info(
+            "Imported %d of %d bank rows (%d skipped) in %.2fs (%.0f rows/s)",
+            stats['questions'], rows, stats['skipped'], stats['elapsed'], stats['rate'],
+        )
+    return stats
+
+
+# ----------------- Export -----------------
+def bank_records(quizzes):
+    """One record per question of ``quizzes`` (a QuizSet queryset), read in chunks."""
+    questions = (
+        Question.objects.filter(quiz_set__in=quizzes)
+        .select_related('quiz_set__department')
+        .prefetch_related(Prefetch('choices', queryset=Choice.objects.order_by('id')))
+        .order_by('quiz_set_id', 'id')
+    )
+    for question in questions.iterator(chunk_size=CHUNK_SIZE):
+        yield {
+            'department': question.quiz_set.department.name,
+            'quiz': question.quiz_set.title,
+            'text': question.text,
+            'type': question.question_type,
+            'image': question.image_name or '',
+            'reference_answer': question.reference_answer,
+            'keywords': question.keywords,
+            'choices': [{'text': choice.text, 'is_correct': choice.is_correct} for choice in question.choices.all()],
+        }
+
+
+def bank_rows(quizzes):
+    """The header, then one row per question, in the layout the tabular readers expect."""
+    width = (
+        Choice.objects.filter(question__quiz_set__in=quizzes).values('question').order_by()
+        .annotate(count=Count('id')).aggregate(width=Max('count'))['width'] or 0
+    )
+    yield [title for title, _ in COLUMNS] + [f'Choice {n}' for n in range(1, width + 1)]
+    for record in bank_records(quizzes):
+        correct = ','.join(str(n) for n, choice in enumerate(record['choices'], start=1) if choice['is_correct'])
+        yield (
+            [record[key] for _, key in COLUMNS[:-1]] + [correct]
+            + [choice['text'] for choice in record['choices']]
+        )
+
+
+def stream_jsonl(records):
+    lines = []
+    for count, record in enumerate(records, start=1):
+        lines.append(json.dumps(record, ensure_ascii=False) + '\n')
+        if count % ROWS_PER_CHUNK == 0:
+            yield ''.join(lines).encode()
+            lines = []
+    yield ''.join(lines).encode()
+
+
+BANK_EXPORT_FORMATS = {
+    'csv': ('text/csv', lambda quizzes: stream_csv(bank_rows(quizzes))),
+    'xlsx': (
+        'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+        lambda quizzes: stream_xlsx(bank_rows(quizzes), sheet_name='Questions'),
+    ),
+    'jsonl': ('application/x-ndjson', lambda quizzes: stream_jsonl(bank_records(quizzes))),
+}
@@ -1,6 +1,20 @@
-from .models import Department
+from django.conf import settings
+from django.utils.functional import SimpleLazyObject
+
+from . import sidebar
+
 
 def department_list(request):
+    # Lazy, so a page whose sidebar fragment is cached never loads the list.
+    match = getattr(request, 'resolver_match', None)
+    # Loaded with the user by auth.SidebarVersionBackend; anonymous pages read it on demand.
+    version = getattr(getattr(request, 'user', None), 'sidebar_version', None)
+    if version is None:
+        version = SimpleLazyObject(sidebar.get_version)
     return {
-        'departments': Department.objects.all()
+        'departments': SimpleLazyObject(lambda: sidebar.get_departments(str(version))),
+        'sidebar_version': version,
+        'sidebar_cache_timeout': settings.SIDEBAR_CACHE_TIMEOUT,
+        'active_page': match.url_name if match else '',
+        'active_department_id': match.kwargs.get('department_id') if match else None,
     }
@@ -0,0 +1,274 @@
+import csv
+import io
+import logging
+import re
+import zipfile
+from datetime import datetime, timedelta
+from xml.sax.saxutils import escape
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+from django.utils.timezone import localtime
+
+from .models import QuizResult, UserAnswer
+from .pdf import iter_result_pdfs
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 500
+ROWS_PER_CHUNK = 500
+
+
+def filter_results(department=None, quiz=None, since=None, until=None, status=None):
+    """QuizResults matching the export filters; ``since``/``until`` are inclusive dates."""
+    results = QuizResult.objects.all()
+    if department:
+        results = results.filter(department_id=department)
+    if quiz:
+        results = results.filter(quiz_id=quiz)
+    if since:
+        results = results.filter(created_at__date__gte=since)
+    if until:
+        results = results.filter(created_at__date__lte=until)
+    if status:
+        results = results.filter(status=status)
+    return results
+
+
+class _ZipStream:
+    """Write-only file object that hands zipfile's output back in pieces.
+
+    zipfile notices it cannot seek and writes data descriptors after each
+    member, so the archive never has to exist in full anywhere.
+    """
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        if self._chunks:
+            data = b''.join(self._chunks)
+            self._chunks = []
+            yield data
+
+
+def stream_zip(members, compression=zipfile.ZIP_STORED):
+    """Yield a ZIP archive of ``(name, content)`` members chunk by chunk.
+
+    ``content`` is either bytes or an iterable of byte chunks; the latter is
+    copied into the archive as it is produced.
+    """
+    stream = _ZipStream()
+    with zipfile.ZipFile(stream, mode='w', compression=compression) as archive:
+        for name, content in members:
+            if isinstance(content, bytes):
+                archive.writestr(name, content)
+            else:
+                with archive.open(name, mode='w', force_zip64=True) as member:
+                    for chunk in content:
+                        member.write(chunk)
+                        yield from stream.drain()
+            yield from stream.drain()
+    yield from stream.drain()
+
+
+def stream_pdf_zip(results, workers=1, stats=None):
+    """Stream every result's PDF back as one ZIP, rendering only stale ones."""
+    results = results.select_related('user', 'quiz', 'summary').order_by('pk')
+    stats = {} if stats is None else stats
+
+    yield from stream_zip(iter_result_pdfs(
+        results.iterator(chunk_size=CHUNK_SIZE), workers=workers, stats=stats,
+    ))
+
+    logger.info(
+        "Exported %d result PDFs (%d rendered) in %.1fs (%.1f PDFs/s)",
+        stats['count'], stats['rendered'], stats['elapsed'], stats['rate'],
+    )
+
+
+# ----------------- Responses -----------------
+async def _in_thread(chunks):
+    """Produce ``chunks`` one at a time in a worker thread."""
+    chunks = iter(chunks)
+    next_chunk = sync_to_async(next)
+    try:
+        while (chunk := await next_chunk(chunks, None)) is not None:
+            yield chunk
+    finally:
+        if hasattr(chunks, 'close'):
+            await sync_to_async(chunks.close)()
+
+
+def download_response(request, chunks, content_type, filename):
+    """Stream ``chunks`` as an attachment named ``filename``.
+
+    Under ASGI Django reads a plain iterator into a list before sending any
+    of it, so there the chunks are handed over as an async iterator instead.
+    """
+    if isinstance(request, ASGIRequest):
+        chunks = _in_thread(chunks)
+    response = StreamingHttpResponse(chunks, content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+# ----------------- Tabular exports -----------------
+RESULT_COLUMNS = [
+    ('Result ID', 'id'),
+    ('User', 'user__username'),
+    ('Department', 'department__name'),
+    ('Test Title', 'quiz__title'),
+    ('MCQ %', 'summary__mcq_percent'),
+    ('Written %', 'summary__written_percent'),
+    ('Status', 'status'),
+    ('Start Time', 'start_time'),
+    ('End Time', 'end_time'),
+    ('Time Taken (s)', 'time_taken'),
+    ('Created At', 'created_at'),
+]
+
+ANSWER_COLUMNS = [
+    ('Result ID', 'quiz_result_id'),
+    ('User', 'user__username'),
+    ('Test Title', 'quiz_result__quiz__title'),
+    ('Question ID', 'question_id'),
+    ('Question Type', 'question__question_type'),
+    ('Question', 'question__text'),
+    ('Selected Choice', 'selected_choice__text'),
+    ('Correct', 'selected_choice__is_correct'),
+    ('Written Answer', 'written_answer'),
+    ('Grade', 'grade'),
+]
+
+
+def _cell(value):
+    if isinstance(value, datetime):
+        return localtime(value).strftime('%Y-%m-%d %H:%M:%S')
+    if isinstance(value, timedelta):
+        return round(value.total_seconds())
+    return value
+
+
+def tabular_rows(results, answers=False):
+    """Yield the header and then one tuple per row, reading the table in chunks.
+
+    The header goes out before any query runs, so a streamed download starts
+    immediately, and rows come from a server-side cursor on Postgres.
+    """
+    if answers:
+        columns = ANSWER_COLUMNS
+        queryset = UserAnswer.objects.filter(quiz_result__in=results).order_by('quiz_result_id', 'id')
+    else:
+        columns = RESULT_COLUMNS
+        queryset = results.order_by('id')
+
+    yield [header for header, _ in columns]
+    for row in queryset.values_list(*[field for _, field in columns]).iterator(chunk_size=CHUNK_SIZE):
+        yield [_cell(value) for value in row]
+
+
+def stream_csv(rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for count, row in enumerate(rows, start=1):
+        writer.writerow(['' if value is None else value for value in row])
+        if count % ROWS_PER_CHUNK == 0 or count == 1:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode()
+
+
+# Characters XML 1.0 does not allow; they can turn up in pasted answers.
+_XML_ILLEGAL = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+XLSX_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '</Types>'
+)
+XLSX_ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+XLSX_WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets><sheet name="{name}" sheetId="1" r:id="rId1"/></sheets>'
+    '</workbook>'
+)
+XLSX_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+    'Target="worksheets/sheet1.xml"/>'
+    '</Relationships>'
+)
+
+
+def _xlsx_cell(value):
+    if value is None:
+        return '<c/>'
+    if isinstance(value, bool):
+        return f'<c t="b"><v>{int(value)}</v></c>'
+    if isinstance(value, (int, float)):
+        return f'<c><v>{value}</v></c>'
+    text = escape(_XML_ILLEGAL.sub('', str(value)))
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>'
+
+
+def _xlsx_sheet(rows):
+    yield (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+    ).encode()
+    parts = []
+    for count, row in enumerate(rows, start=1):
+        parts.append('<row>' + ''.join(_xlsx_cell(value) for value in row) + '</row>')
+        if count % ROWS_PER_CHUNK == 0:
+            yield ''.join(parts).encode()
+            parts = []
+    parts.append('</sheetData></worksheet>')
+    yield ''.join(parts).encode()
+
+
+def stream_xlsx(rows, sheet_name='Results'):
+    """Stream a single-sheet XLSX workbook without holding it in memory.
+
+    Cells are inline strings, so no shared-strings table has to be built up
+    front and the sheet part can be deflated row by row.
+    """
+    return stream_zip([
+        ('[Content_Types].xml', XLSX_CONTENT_TYPES.encode()),
+        ('_rels/.rels', XLSX_ROOT_RELS.encode()),
+        ('xl/workbook.xml', XLSX_WORKBOOK.format(name=escape(sheet_name)).encode()),
+        ('xl/_rels/workbook.xml.rels', XLSX_WORKBOOK_RELS.encode()),
+        ('xl/worksheets/sheet1.xml', _xlsx_sheet(rows)),
+    ], compression=zipfile.ZIP_DEFLATED)
+
+
+EXPORT_FORMATS = {
+    'csv': ('text/csv', stream_csv),
+    'xlsx': ('application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', stream_xlsx),
+}
@@ -0,0 +1,208 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+
+from django.conf import settings
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.gif')
+
+# Longest side of each generated variant, in pixels. "display" matches the
+# 300px box the question pages show images in, "thumb" the admin preview.
+VARIANT_SIZES = {
+    'thumb': 100,
+    'display': 300,
+}
+
+VARIANTS_DIRNAME = 'variants'
+MANIFEST_NAME = 'catalog.json'
+
+_catalog = None
+_catalog_tag = None
+_lock = threading.Lock()
+
+
+def images_dir():
+    return Path(settings.QUIZ_IMAGES_DIR)
+
+
+def variants_dir():
+    return images_dir() / VARIANTS_DIRNAME
+
+
+def _sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as source:
+        for block in iter(lambda: source.read(1 << 16), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _save_variant(image, size, stem, fallback_format):
+    variant = image.copy()
+    variant.thumbnail((size, size))
+    if fallback_format == 'JPEG' and variant.mode not in ('RGB', 'L'):
+        fallback_image = variant.convert('RGB')
+    else:
+        fallback_image = variant
+    extension = 'jpg' if fallback_format == 'JPEG' else 'png'
+    files = {'webp': f'{stem}.webp', 'fallback': f'{stem}.{extension}'}
+
+    variant.save(variants_dir() / files['webp'], 'WEBP', quality=80, method=6)
+    fallback_image.save(variants_dir() / files['fallback'], fallback_format, optimize=True)
+    return {
+        **files,
+        'fallback_type': 'image/jpeg' if fallback_format == 'JPEG' else 'image/png',
+        'width': variant.width,
+        'height': variant.height,
+    }
+
+
+def _catalog_entry(path, previous):
+    stat = path.stat()
+    if (
+        previous
+        and previous['size'] == stat.st_size
+        and previous['mtime_ns'] == stat.st_mtime_ns
+        and all((variants_dir() / f).exists()
+                for variant in previous['variants'].values() for f in (variant['webp'], variant['fallback']))
+    ):
+        return previous
+
+    sha256 = _sha256(path)
+    with Image.open(path) as image:
+        image = ImageOps.exif_transpose(image)
+        fallback_format = 'JPEG' if path.suffix.lower() in ('.jpg', '.jpeg') else 'PNG'
+        # Variant names carry the content hash, so they can be cached forever.
+        variants = {
+            name: _save_variant(image, size, f'{path.stem}-{sha256[:12]}-{name}', fallback_format)
+            for name, size in VARIANT_SIZES.items()
+        }
+        width, height = image.size
+    return {
+        'sha256': sha256,
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+        'width': width,
+        'height': height,
+        'variants': variants,
+    }
+
+
+def build_catalog():
+    """Scan the quiz image folder, render missing variants and rewrite the manifest.
+
+    Images whose size and mtime are unchanged keep their entry without being
+    re-read; variants no longer referenced are deleted.
+    """
+    global _catalog, _catalog_tag
+    source = images_dir()
+    variants_dir().mkdir(parents=True, exist_ok=True)
+    previous = _read_manifest()
+
+    catalog = {}
+    if source.is_dir():
+        for path in sorted(source.iterdir()):
+            if not (path.is_file() and path.suffix.lower() in IMAGE_EXTENSIONS):
+                continue
+            try:
+                catalog[path.name] = _catalog_entry(path, previous.get(path.name))
+            except OSError:
+                logger.warning("Skipping unreadable quiz image %s", path.name, exc_info=True)
+
+    referenced = {MANIFEST_NAME} | {
+        f for entry in catalog.values() for variant in entry['variants'].values()
+        for f in (variant['webp'], variant['fallback'])
+    }
+    for path in variants_dir().iterdir():
+        if path.name not in referenced:
+            path.unlink()
+
+    manifest = variants_dir() / MANIFEST_NAME
+    temporary = manifest.with_suffix('.tmp')
+    temporary.write_text(json.dumps(catalog, indent=2, sort_keys=True))
+    os.replace(temporary, manifest)
+
+    with _lock:
+        _catalog = catalog
+        _catalog_tag = None
+    return catalog
+
+
+def _read_manifest():
+    try:
+        return json.loads((variants_dir() / MANIFEST_NAME).read_text())
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def _source_names():
+    """Catalog without variants: just the image files in the source folder."""
+    try:
+        return {
+            path.name: None for path in sorted(images_dir().iterdir())
+            if path.is_file() and path.suffix.lower() in IMAGE_EXTENSIONS
+        }
+    except OSError:
+        return {}
+
+
+def get_catalog():
+    """The image catalog of this process, read from the manifest on first use.
+
+    Never writes anything: without a manifest (a fresh checkout before
+    collectstatic or refresh_image_catalog) the source images are listed
+    with no variants, and pages show the originals.
+    """
+    global _catalog
+    if _catalog is None:
+        with _lock:
+            if _catalog is None:
+                _catalog = _read_manifest()
+                if not _catalog:
+                    _catalog = _source_names()
+                    if _catalog:
+                        logger.warning("No quiz image manifest; run refresh_image_catalog to build variants")
+    return _catalog
+
+
+def reset_catalog():
+    global _catalog, _catalog_tag
+    with _lock:
+        _catalog = _catalog_tag = None
+
+
+def catalog_tag():
+    """Short fingerprint of the loaded catalog, for cache keys of data derived from it."""
+    global _catalog_tag
+    if _catalog_tag is None:
+        # Variant file names embed the content hash; mtimes differ per checkout.
+        variants = {name: entry and entry['variants'] for name, entry in get_catalog().items()}
+        payload = json.dumps(variants, sort_keys=True).encode()
+        _catalog_tag = hashlib.sha256(payload).hexdigest()[:12]
+    return _catalog_tag
+
+
+def image_names():
+    return sorted(get_catalog())
+
+
+def picture(name, variant='display'):
+    """Everything a ``<picture>`` element needs for ``name``, or None for unknown images."""
+    entry = get_catalog().get(name)
+    if entry is None:  # unknown, or listed without variants
+        return None
+    files = entry['variants'][variant]
+    base = f"{settings.STATIC_URL}quiz_images/{VARIANTS_DIRNAME}/"
+    return {
+        'webp_url': base + files['webp'],
+        'fallback_url': base + files['fallback'],
+        'fallback_type': files['fallback_type'],
+        'width': files['width'],
+        'height': files['height'],
+    }
@@ -0,0 +1,174 @@
+import json
+import logging
+import time
+from collections import Counter, defaultdict
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+
+logger = logging.getLogger('quiz_app.requests')
+
+_current = ContextVar('request_metrics', default=None)
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.view = None
+        self.queries = 0
+        self.db_time = 0.0
+        self.statements = Counter()
+        self.spans = defaultdict(float)
+
+    def record_query(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - start
+            self.queries += 1
+            self.statements[(sql, repr(params))] += 1
+
+    @property
+    def duplicate_queries(self):
+        """Queries that repeated an earlier statement with the same parameters."""
+        return sum(count - 1 for count in self.statements.values() if count > 1)
+
+    @property
+    def similar_queries(self):
+        """Queries that repeated an earlier statement with other parameters: the N+1 shape."""
+        templates = Counter(sql for sql, _ in self.statements.elements())
+        return sum(count - 1 for count in templates.values() if count > 1) - self.duplicate_queries
+
+
+@contextmanager
+def span(name):
+    """Add the time spent in the block to the current request's ``name`` timing."""
+    metrics = _current.get()
+    if metrics is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.spans[name] += time.perf_counter() - start
+
+
+def install_template_timing():
+    """Time top-level template renders; included templates render inside them."""
+    from django.template.backends.django import Template
+
+    if getattr(Template.render, 'is_timed', False):
+        return
+    original = Template.render
+
+    def render(self, context=None, request=None):
+        with span('template'):
+            return original(self, context, request)
+
+    render.is_timed = True
+    Template.render = render
+
+
+def over_budget(metrics, total_ms):
+    budgets = settings.REQUEST_BUDGETS
+    measured = {
+        'queries': metrics.queries,
+        'duplicate_queries': metrics.duplicate_queries,
+        'similar_queries': metrics.similar_queries,
+        'db_ms': metrics.db_time * 1000,
+        'total_ms': total_ms,
+    }
+    return sorted(name for name, limit in budgets.items() if limit is not None and measured[name] > limit)
+
+
+def wrap_queries(stack, metrics):
+    stack.enter_context(connection.execute_wrapper(metrics.record_query))
+
+
+class RequestTimingMiddleware:
+    """Record query count, DB time, duplicate queries, template and total time per request.
+
+    Enabled with REQUEST_TIMING=True. Each response gets a Server-Timing header
+    and one JSON log line on ``quiz_app.requests``; requests that exceed
+    REQUEST_BUDGETS are logged as warnings.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.REQUEST_TIMING:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+        install_template_timing()
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        start = time.perf_counter()
+        try:
+            with connection.execute_wrapper(metrics.record_query):
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, metrics, start)
+
+    async def __acall__(self, request):
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        start = time.perf_counter()
+        # Connections are per thread and the ORM runs in the request's
+        # thread-sensitive executor, not on the event loop, so the wrapper has
+        # to be installed on that thread's connection.
+        wrappers = ExitStack()
+        try:
+            await sync_to_async(wrap_queries)(wrappers, metrics)
+            try:
+                response = await self.get_response(request)
+            finally:
+                await sync_to_async(wrappers.close)()
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, metrics, start)
+
+    def finish(self, request, response, metrics, start):
+        total_ms = (time.perf_counter() - start) * 1000
+
+        timings = [
+            f'db;dur={metrics.db_time * 1000:.1f};desc="{metrics.queries} queries"',
+            *(f'{name};dur={seconds * 1000:.1f}' for name, seconds in sorted(metrics.spans.items())),
+            f'total;dur={total_ms:.1f}',
+        ]
+        response['Server-Timing'] = ', '.join(timings)
+
+        exceeded = over_budget(metrics, total_ms)
+        record = {
+            'method': request.method,
+            'path': request.path,
+            'view': metrics.view,
+            'status': response.status_code,
+            'queries': metrics.queries,
+            'duplicate_queries': metrics.duplicate_queries,
+            'similar_queries': metrics.similar_queries,
+            'db_ms': round(metrics.db_time * 1000, 1),
+            **{f'{name}_ms': round(seconds * 1000, 1) for name, seconds in metrics.spans.items()},
+            'total_ms': round(total_ms, 1),
+            'over_budget': exceeded,
+        }
+        logger.log(logging.WARNING if exceeded else logging.INFO, json.dumps(record))
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        metrics = _current.get()
+        if metrics is not None:
+            metrics.view = f"{view_func.__module__}.{getattr(view_func, '__name__', type(view_func).__name__)}"
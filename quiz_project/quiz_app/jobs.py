@@ -0,0 +1,185 @@
+import logging
+import threading
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .analytics import refresh_item_stats
+from .autograde import suggest_grades
+from .leaderboard import update_leaderboards
+from .models import BackgroundJob, QuizResult, UserAnswer
+from .pdf import generate_result_pdf
+
+logger = logging.getLogger(__name__)
+
+RENDER_PDF = 'render_pdf'
+AUTOGRADE = 'autograde'
+UPDATE_LEADERBOARD = 'leaderboard'
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+
+def render_pdf(result_id):
+    result = QuizResult.objects.select_related('user', 'quiz', 'summary').get(pk=result_id)
+    if result.status == 'Pending':
+        return  # status went back to Pending after the job was queued
+    generate_result_pdf(result)
+
+
+def autograde(result_id):
+    suggest_grades(UserAnswer.objects.filter(quiz_result_id=result_id, grade__isnull=True))
+
+
+def update_leaderboard(result_id):
+    update_leaderboards([result_id])
+
+
+HANDLERS = {
+    RENDER_PDF: render_pdf,
+    AUTOGRADE: autograde,
+    UPDATE_LEADERBOARD: update_leaderboard,
+}
+
+
+# ----------------- Producing -----------------
+def enqueue_job(kind, result_id):
+    """Queue ``kind`` for a result, coalescing with any job already there.
+
+    Re-queueing bumps ``generation`` so a worker still running the previous
+    request cannot mark the new one as done.
+    """
+    now = timezone.now()
+    requeue = dict(
+        status=QUEUED, attempts=0, run_after=now, locked_at=None,
+        last_error='', generation=F('generation') + 1, updated_at=now,
+    )
+    if BackgroundJob.objects.filter(kind=kind, quiz_result_id=result_id).update(**requeue):
+        return
+    try:
+        with transaction.atomic():
+            BackgroundJob.objects.create(kind=kind, quiz_result_id=result_id, run_after=now)
+    except IntegrityError:
+        BackgroundJob.objects.filter(kind=kind, quiz_result_id=result_id).update(**requeue)
+
+
+def cancel_job(kind, result_id):
+    BackgroundJob.objects.filter(kind=kind, quiz_result_id=result_id).delete()
+
+
+# ----------------- Consuming -----------------
+def claim_job():
+    """Atomically move one due job from queued to running and return it.
+
+    The claim is a conditional UPDATE on (status, generation), which works the
+    same on SQLite and Postgres without SELECT ... FOR UPDATE.
+    """
+    now = timezone.now()
+    candidates = (
+        BackgroundJob.objects.filter(status=QUEUED, run_after__lte=now)
+        .order_by('run_after')
+        .values_list('id', 'generation')[:20]
+    )
+    for job_id, generation in candidates:
+        claimed = BackgroundJob.objects.filter(id=job_id, status=QUEUED, generation=generation).update(
+            status=RUNNING, locked_at=now, attempts=F('attempts') + 1, updated_at=now,
+        )
+        if claimed:
+            return BackgroundJob.objects.get(id=job_id)
+    return None
+
+
+def run_job(job):
+    current = BackgroundJob.objects.filter(id=job.id, status=RUNNING, generation=job.generation)
+    try:
+        HANDLERS[job.kind](job.quiz_result_id)
+    except QuizResult.DoesNotExist:
+        current.delete()
+    except Exception:
+        error = traceback.format_exc()
+        logger.exception("Job %s (%s) failed on attempt %s", job.id, job.kind, job.attempts)
+        now = timezone.now()
+        if job.attempts >= settings.JOB_MAX_ATTEMPTS:
+            current.update(status=FAILED, last_error=error, locked_at=None, updated_at=now)
+        else:
+            delay = settings.JOB_RETRY_BACKOFF * 2 ** (job.attempts - 1)
+            current.update(
+                status=QUEUED, last_error=error, locked_at=None, updated_at=now,
+                run_after=now + timedelta(seconds=delay),
+            )
+    else:
+        current.update(status=DONE, last_error='', locked_at=None, updated_at=timezone.now())
+
+
+def requeue_stale_jobs():
+    """Hand jobs left running by a crashed worker back to the queue.
+
+    Bumps ``generation`` like enqueue_job, so a worker that was only slow
+    cannot overwrite the outcome of whoever claims the job next.
+    """
+    now = timezone.now()
+    cutoff = now - timedelta(seconds=settings.JOB_STALE_AFTER)
+    return BackgroundJob.objects.filter(status=RUNNING, locked_at__lt=cutoff).update(
+        status=QUEUED, locked_at=None, run_after=now, generation=F('generation') + 1, updated_at=now,
+    )
+
+
+def run_until_empty():
+    processed = 0
+    while True:
+        job = claim_job()
+        if job is None:
+            return processed
+        run_job(job)
+        processed += 1
+
+
+def work(concurrency=None, poll_interval=None, stop_event=None):
+    """Run ``concurrency`` worker threads until ``stop_event`` is set."""
+    concurrency = concurrency or settings.JOB_WORKER_CONCURRENCY
+    poll_interval = poll_interval or settings.JOB_POLL_INTERVAL
+    stop_event = stop_event or threading.Event()
+
+    def loop():
+        while not stop_event.is_set():
+            close_old_connections()
+            try:
+                requeue_stale_jobs()
+                processed = run_until_empty()
+            except Exception:
+                logger.exception("Worker loop error")
+                processed = 0
+            if not processed:
+                stop_event.wait(poll_interval)
+        close_old_connections()
+
+    def refresh_stats():
+        # Item statistics are rebuilt only for quizzes with new activity, so
+        # an idle tick is a handful of index lookups.
+        while not stop_event.wait(settings.ITEM_STATS_INTERVAL):
+            close_old_connections()
+            try:
+                refresh_item_stats()
+            except Exception:
+                logger.exception("Item statistics refresh failed")
+        close_old_connections()
+
+    threads = [threading.Thread(target=loop, name=f'job-worker-{i}', daemon=True) for i in range(concurrency)]
+    if settings.ITEM_STATS_INTERVAL:
+        threads.append(threading.Thread(target=refresh_stats, name='item-stats', daemon=True))
+    for thread in threads:
+        thread.start()
+    try:
+        while any(thread.is_alive() for thread in threads):
+            for thread in threads:
+                thread.join(timeout=1)
+    except KeyboardInterrupt:
+        stop_event.set()
+        for thread in threads:
+            thread.join()
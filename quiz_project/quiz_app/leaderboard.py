@@ -0,0 +1,150 @@
+import threading
+
+from django.db import transaction
+from django.db.models import Avg, Count, ExpressionWrapper, F, FloatField, Max, Q
+from django.db.models.functions import Coalesce, NullIf
+
+from .models import DepartmentLeaderboardEntry, QuizLeaderboardEntry, QuizResult
+
+# (entry model, the field it is ranked within)
+BOARDS = [
+    (QuizLeaderboardEntry, 'quiz'),
+    (DepartmentLeaderboardEntry, 'department'),
+]
+
+ENTRY_FIELDS = ['attempts', 'best_score', 'average_score', 'passed', 'pass_rate', 'updated_at']
+
+# Board order; the (scope, -best_score, -average_score, user) indexes serve it.
+RANK_ORDER = ['-best_score', '-average_score', 'user_id']
+
+BATCH_SIZE = 1000
+
+# Percent of the attempt's questions answered correctly, counting a written
+# answer by its grade; ungraded written answers count as zero until graded.
+ATTEMPT_SCORE = ExpressionWrapper(
+    (F('summary__mcq_correct') + F('summary__written_graded_sum') / 100.0) * 100.0
+    / NullIf(F('summary__mcq_total') + F('summary__written_total'), 0),
+    output_field=FloatField(),
+)
+
+
+def build_entries(model, scope, results):
+    """Unsaved entries for every (scope, user) pair among the finished ``results``."""
+    rows = (
+        results.filter(end_time__isnull=False, **{f'{scope}__isnull': False})
+        .values(f'{scope}_id', 'user_id').order_by()
+        .annotate(
+            attempts=Count('id'),
+            best_score=Coalesce(Max(ATTEMPT_SCORE), 0.0),
+            average_score=Coalesce(Avg(ATTEMPT_SCORE), 0.0),
+            passed=Count('id', filter=Q(status='Pass')),
+        )
+    )
+    return [
+        model(
+            **{f'{scope}_id': row[f'{scope}_id']},
+            user_id=row['user_id'],
+            attempts=row['attempts'],
+            best_score=row['best_score'],
+            average_score=row['average_score'],
+            passed=row['passed'],
+            pass_rate=row['passed'] * 100 / row['attempts'],
+        )
+        for row in rows
+    ]
+
+
+def rank_page(entries, page):
+    """Set ``rank`` on each entry of ``page``, a page of ``entries`` in RANK_ORDER.
+
+    Ranks are not stored, so a finished attempt only rewrites its own entry.
+    Entries with the same best and average score share a rank (1, 2, 2, 4);
+    the page's first rank costs one indexed count of the entries ahead of it
+    and the rest follow from their positions.
+    """
+    previous = None
+    for position, entry in enumerate(page, start=page.start_index()):
+        score = (entry.best_score, entry.average_score)
+        if previous is None:
+            rank = 1 + entries.filter(
+                Q(best_score__gt=entry.best_score)
+                | Q(best_score=entry.best_score, average_score__gt=entry.average_score)
+            ).count()
+        elif score != previous:
+            rank = position
+        entry.rank = rank
+        previous = score
+    return page
+
+
+def update_leaderboards(result_ids):
+    """Bring the boards touched by ``result_ids`` up to date after attempts finish or are graded.
+
+    Recomputes only the entries of those results' users on those results'
+    quizzes and departments; nobody else's row is written.
+    """
+    keys = QuizResult.objects.filter(pk__in=list(result_ids)).values_list('user_id', 'quiz_id', 'department_id')
+    update_entries(list(keys))
+
+
+def update_entries(keys):
+    """Recompute the entries of the given (user_id, quiz_id, department_id) keys."""
+    users = {user_id for user_id, _, _ in keys}
+    scope_ids = {
+        'quiz': {quiz_id for _, quiz_id, _ in keys},
+        'department': {department_id for _, _, department_id in keys if department_id is not None},
+    }
+    for model, scope in BOARDS:
+        if not scope_ids[scope]:
+            continue
+        results = QuizResult.objects.filter(user_id__in=users, **{f'{scope}_id__in': scope_ids[scope]})
+        entries = build_entries(model, scope, results)
+        current = {(getattr(entry, f'{scope}_id'), entry.user_id) for entry in entries}
+        with transaction.atomic():
+            # A user whose finished attempts are gone drops off the board.
+            gone = [
+                entry_id for entry_id, scope_id, user_id in model.objects.filter(
+                    user_id__in=users, **{f'{scope}_id__in': scope_ids[scope]}
+                ).values_list('id', f'{scope}_id', 'user_id')
+                if (scope_id, user_id) not in current
+            ]
+            model.objects.filter(pk__in=gone).delete()
+            model.objects.bulk_create(
+                entries, update_conflicts=True, unique_fields=[scope, 'user'], update_fields=ENTRY_FIELDS,
+            )
+
+
+# Deleted attempts whose boards wait for the transaction to commit, per
+# thread and database alias (as scoring does for summaries).
+_pending = threading.local()
+
+
+def schedule_update(user_id, quiz_id, department_id):
+    """Update the boards an attempt counted towards once its deletion commits.
+
+    The attempt is gone by then, so its keys are taken from the deleted row
+    rather than looked up again; a cascade that deletes many attempts is
+    folded into one update by the first callback to run.
+    """
+    pending = _pending.__dict__.setdefault(transaction.get_connection().alias, set())
+    pending.add((user_id, quiz_id, department_id))
+
+    def update():
+        if pending:
+            keys = list(pending)
+            pending.clear()
+            update_entries(keys)
+
+    transaction.on_commit(update)
+
+
+def rebuild_leaderboards():
+    """Recompute every board from all finished attempts; returns the entry count per board."""
+    counts = {}
+    for model, scope in BOARDS:
+        entries = build_entries(model, scope, QuizResult.objects.all())
+        with transaction.atomic():
+            model.objects.all().delete()
+            model.objects.bulk_create(entries, batch_size=BATCH_SIZE)
+        counts[scope] = len(entries)
+    return counts
@@ -0,0 +1,280 @@
+import http.cookiejar
+import math
+import random
+import re
+import subprocess
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import Client
+from django.urls import Resolver404, resolve, reverse
+from django.utils import timezone
+
+from .models import QuizSet
+
+WORDS = "the signal drops when the router restarts so we check the fiber link and the gateway logs".split()
+
+_FIELD = re.compile(r'<(input|textarea)\b([^>]*)>', re.IGNORECASE)
+_ATTR = re.compile(r'([\w-]+)="([^"]*)"')
+_GRADE_LINK = re.compile(r'/grade/(\d+)/')
+
+
+# ----------------- Sessions -----------------
+class ClientSession:
+    """Talks to the app in-process through Django's test client, against the configured database."""
+
+    def __init__(self, user):
+        self.client = Client(raise_request_exception=False, HTTP_HOST='localhost')
+        self.client.force_login(user)
+
+    def request(self, method, path, data=None):
+        if method == 'POST':
+            response = self.client.post(path, data or {})
+        else:
+            response = self.client.get(path)
+        body = b''.join(response.streaming_content) if response.streaming else response.content
+        return response.status_code, body.decode(errors='replace'), response.get('Location')
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+class HttpSession:
+    """Talks to a running server over HTTP, logging in through the login form."""
+
+    def __init__(self, base_url, username, password, timeout=30):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.cookies = http.cookiejar.CookieJar()
+        self.opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(self.cookies), _NoRedirect)
+
+        login = reverse('login')
+        self.request('GET', login)
+        status, _, _ = self.request('POST', login, {'username': username, 'password': password})
+        if status != 302:
+            raise RuntimeError(f"Login as {username} failed with status {status}")
+
+    def request(self, method, path, data=None):
+        url = self.base_url + path
+        body = None
+        if method == 'POST':
+            csrf = next((cookie.value for cookie in self.cookies if cookie.name == 'csrftoken'), '')
+            body = urllib.parse.urlencode({**(data or {}), 'csrfmiddlewaretoken': csrf}).encode()
+        request = urllib.request.Request(url, data=body, method=method, headers={'Referer': url})
+        try:
+            with self.opener.open(request, timeout=self.timeout) as response:
+                return response.status, response.read().decode(errors='replace'), None
+        except urllib.error.HTTPError as error:
+            return error.code, error.read().decode(errors='replace'), error.headers.get('Location')
+
+
+# ----------------- Recording -----------------
+def url_label(path):
+    """Group requests by URL name so every quiz and question lands in one bucket."""
+    try:
+        return resolve(urllib.parse.urlsplit(path).path).url_name or path
+    except Resolver404:
+        return path
+
+
+class Recorder:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.samples = defaultdict(list)
+        self.errors = Counter()
+        self.completed = Counter()
+
+    def timed(self, session, method, path, data=None):
+        label = f"{method} {url_label(path)}"
+        started = time.perf_counter()
+        try:
+            status, body, location = session.request(method, path, data)
+        except Exception:
+            status, body, location = 0, '', None
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        with self.lock:
+            self.samples[label].append(elapsed_ms)
+            if not 200 <= status < 400:
+                self.errors[label] += 1
+        return status, body, location
+
+
+def percentile(sorted_values, p):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    return sorted_values[max(0, math.ceil(p / 100 * len(sorted_values)) - 1)]
+
+
+def _stats(values, errors, elapsed):
+    values = sorted(values)
+    return {
+        'count': len(values),
+        'errors': errors,
+        'throughput_rps': round(len(values) / elapsed, 2) if elapsed else None,
+        'mean_ms': round(sum(values) / len(values), 2),
+        'p50_ms': round(percentile(values, 50), 2),
+        'p95_ms': round(percentile(values, 95), 2),
+        'p99_ms': round(percentile(values, 99), 2),
+        'max_ms': round(values[-1], 2),
+    }
+
+
+# ----------------- Scenarios -----------------
+def fill_form(body, rng):
+    """Answer every radio group, textarea and number field found in ``body``."""
+    data = {}
+    radios = defaultdict(list)
+    for tag, attrs in _FIELD.findall(body):
+        attrs = dict(_ATTR.findall(attrs))
+        name = attrs.get('name')
+        if not name:
+            continue
+        if tag.lower() == 'textarea':
+            data[name] = ' '.join(rng.choices(WORDS, k=rng.randint(5, 30)))
+        elif attrs.get('type') == 'radio':
+            radios[name].append(attrs.get('value', ''))
+        elif attrs.get('type') == 'number':
+            data[name] = str(rng.randint(int(attrs.get('min', 0)), int(attrs.get('max', 100))))
+    for name, values in radios.items():
+        data[name] = rng.choice(values)
+    return data
+
+
+def _local(location):
+    parts = urllib.parse.urlsplit(location)
+    return parts.path + (f'?{parts.query}' if parts.query else '')
+
+
+def candidate_flow(session, recorder, quiz_id, rng, max_steps=500):
+    """start_quiz -> every quiz_question (or the quiz_paper) -> quiz_result."""
+    path, method, data = reverse('start_quiz', args=[quiz_id]), 'GET', None
+    for _ in range(max_steps):
+        status, body, location = recorder.timed(session, method, path, data)
+        if location:
+            path, method, data = _local(location), 'GET', None
+        elif status == 200 and method == 'GET' and url_label(path) in ('quiz_question', 'quiz_paper'):
+            method, data = 'POST', fill_form(body, rng)
+        else:
+            return status == 200 and url_label(path) == 'quiz_result'
+    return False
+
+
+def staff_flow(session, recorder, rng):
+    """Open the dashboard, then grade one of the attempts linked from it."""
+    _, body, _ = recorder.timed(session, 'GET', reverse('dashboard'))
+    result_ids = _GRADE_LINK.findall(body)
+    if not result_ids:
+        return False
+    path = reverse('grade_written', args=[rng.choice(result_ids)])
+    status, body, _ = recorder.timed(session, 'GET', path)
+    if status != 200:
+        return False
+    status, _, _ = recorder.timed(session, 'POST', path, fill_form(body, rng))
+    return status == 302
+
+
+# ----------------- Runner -----------------
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def seeded_population(prefix='load'):
+    """Quiz ids, candidate users and staff users created by seed_load_data."""
+    quiz_ids = list(QuizSet.objects.filter(questions__isnull=False).distinct().values_list('id', flat=True))
+    candidates = list(User.objects.filter(username__startswith=f"{prefix}_user_"))
+    staff = list(User.objects.filter(username__startswith=f"{prefix}_staff_", is_staff=True))
+    return quiz_ids, candidates, staff
+
+
+def run_load_test(candidates, staff, quiz_ids, connect, concurrency=1, seed=0, mode='in-process'):
+    """Drive ``candidates`` through whole attempts and ``staff`` through grading.
+
+    ``connect(user)`` returns a logged-in session for a candidate or staff
+    user. Every session logs in before the clock starts, so password hashing
+    is not part of the measurement. Returns a JSON-serialisable report with
+    per-URL counts, errors, throughput and latency percentiles.
+    """
+    rng = random.Random(seed)
+    recorder = Recorder()
+    tasks = [('candidate', user, rng.choice(quiz_ids), rng.random()) for user in candidates]
+    tasks += [('staff', user, None, rng.random()) for user in staff]
+    rng.shuffle(tasks)
+
+    def login(task):
+        return connect(task[1])
+
+    def run(task, session):
+        role, _, quiz_id, task_seed = task
+        task_rng = random.Random(task_seed)
+        if role == 'candidate':
+            completed = candidate_flow(session, recorder, quiz_id, task_rng)
+        else:
+            completed = staff_flow(session, recorder, task_rng)
+        if completed:
+            with recorder.lock:
+                recorder.completed[role] += 1
+
+    def in_thread(function):
+        def wrapper(*args):
+            try:
+                return function(*args)
+            finally:
+                connection.close()
+        return wrapper
+
+    if concurrency <= 1:
+        sessions = [login(task) for task in tasks]
+    else:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            sessions = list(pool.map(in_thread(login), tasks))
+
+    started_at = timezone.now()
+    started = time.perf_counter()
+    if concurrency <= 1:
+        for task, session in zip(tasks, sessions):
+            run(task, session)
+    else:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            list(pool.map(in_thread(run), tasks, sessions))
+    elapsed = time.perf_counter() - started
+
+    all_samples = [value for values in recorder.samples.values() for value in values]
+    return {
+        'meta': {
+            'commit': git_commit(),
+            'started_at': started_at.isoformat(),
+            'mode': mode,
+            'database': connection.vendor,
+            'concurrency': concurrency,
+            'candidates': len(candidates),
+            'staff': len(staff),
+            'seed': seed,
+            'elapsed_s': round(elapsed, 3),
+        },
+        'completed': {
+            'candidates': recorder.completed['candidate'],
+            'staff': recorder.completed['staff'],
+        },
+        'total': _stats(all_samples, sum(recorder.errors.values()), elapsed) if all_samples else None,
+        'urls': {
+            label: _stats(values, recorder.errors[label], elapsed)
+            for label, values in sorted(recorder.samples.items())
+        },
+    }
@@ -0,0 +1,162 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, close_old_connections, connection
+from django.utils import timezone
+
+from quiz_app.loadtest import percentile
+from quiz_app.models import Choice, Department, Question, QuizResult, QuizSet, UserAnswer
+from quiz_app.views import advance_attempt
+
+PROFILES = {'plain': 'False', 'tuned': 'True'}
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure answer-submission write throughput with the plain and the tuned database "
+        "settings (see quiz_project/db_tuning.py). Each profile runs in its own process; on "
+        "SQLite every profile gets a fresh scratch database, on Postgres the DATABASE_URL "
+        "database is used and the benchmark data is removed afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--profiles', nargs='+', choices=sorted(PROFILES), default=['plain', 'tuned'])
+        parser.add_argument('--threads', type=int, default=8, help="Simultaneous candidates answering.")
+        parser.add_argument('--answers', type=int, default=200, help="Answers submitted per thread.")
+        parser.add_argument('--questions', type=int, default=20, help="Questions per attempt.")
+        parser.add_argument('--output', help="Write the JSON comparison to this file.")
+        parser.add_argument('--run-profile', help="Internal: run one profile in this process.")
+
+    def handle(self, *args, **options):
+        if options['run_profile']:
+            result = self.run_profile(options['run_profile'], options)
+            self.stdout.write(json.dumps(result))
+            return
+
+        comparison = {}
+        for profile in options['profiles']:
+            self.stdout.write(f"Benchmarking {profile} settings with {options['threads']} thread(s)...")
+            with tempfile.TemporaryDirectory() as scratch:
+                env = {**os.environ, 'DB_TUNING': PROFILES[profile]}
+                if not os.getenv('DATABASE_URL'):
+                    env['SQLITE_PATH'] = os.path.join(scratch, 'bench.sqlite3')
+                    self.manage(['migrate', '--verbosity', '0'], env)
+                output = self.manage([
+                    'benchmark_answer_writes', '--run-profile', profile,
+                    '--threads', str(options['threads']),
+                    '--answers', str(options['answers']),
+                    '--questions', str(options['questions']),
+                ], env)
+            comparison[profile] = json.loads(output.strip().splitlines()[-1])
+
+        self.stdout.write(f"{'profile':<8}{'vendor':<12}{'answers/s':>11}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'errors':>8}")
+        for profile, row in comparison.items():
+            self.stdout.write(
+                f"{profile:<8}{row['vendor']:<12}{row['answers_per_s']:>11}{row['p50_ms']:>9}"
+                f"{row['p95_ms']:>9}{row['p99_ms']:>9}{row['errors']:>8}"
+            )
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                json.dump(comparison, output, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Comparison written to {options['output']}"))
+
+    def manage(self, arguments, env):
+        completed = subprocess.run(
+            [sys.executable, 'manage.py', *arguments],
+            cwd=settings.BASE_DIR, env=env, capture_output=True, text=True,
+        )
+        if completed.returncode:
+            raise CommandError(completed.stderr.strip() or f"manage.py {arguments[0]} failed")
+        return completed.stdout
+
+    def run_profile(self, profile, options):
+        tag = f"bench_{uuid.uuid4().hex[:8]}"
+        department = Department.objects.create(name=tag)
+        quiz = QuizSet.objects.create(title=tag, department=department)
+        questions = []
+        for number in range(options['questions']):
+            question = Question.objects.create(quiz_set=quiz, text=f"{tag} {number}", question_type='MCQ')
+            Choice.objects.bulk_create([
+                Choice(question=question, text='right', is_correct=True),
+                Choice(question=question, text='wrong', is_correct=False),
+            ])
+            questions.append((question, list(question.choices.all())))
+        users = [User(username=f"{tag}_{index}") for index in range(options['threads'])]
+        User.objects.bulk_create(users)
+        users = list(User.objects.filter(username__startswith=f"{tag}_"))
+        connection.close()
+
+        lock = threading.Lock()
+        latencies = []
+        errors = []
+
+        def candidate(user):
+            attempt_ids = []
+            try:
+                for answer_number in range(options['answers']):
+                    question_number = answer_number % len(questions) + 1
+                    # One "request" per answer: Django's request_started and
+                    # request_finished signals run close_old_connections too.
+                    close_old_connections()
+                    started = time.perf_counter()
+                    try:
+                        if question_number == 1:
+                            attempt_ids.append(QuizResult.objects.create(
+                                user=user, quiz=quiz, department=department,
+                                start_time=timezone.now(), total_questions=len(questions),
+                            ).id)
+                        question, choices = questions[question_number - 1]
+                        choice = choices[answer_number % 2]
+                        answer = UserAnswer(
+                            user=user, question=question, selected_choice=choice,
+                            quiz_result_id=attempt_ids[-1],
+                        )
+                        advance_attempt(
+                            QuizResult.objects.filter(id=attempt_ids[-1]), question_number,
+                            answer, choice.is_correct,
+                        )
+                    except DatabaseError as error:
+                        with lock:
+                            errors.append(str(error))
+                        continue
+                    finally:
+                        close_old_connections()
+                    with lock:
+                        latencies.append((time.perf_counter() - started) * 1000)
+            finally:
+                connection.close()
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['threads']) as pool:
+            list(pool.map(candidate, users))
+        elapsed = time.perf_counter() - started
+
+        vendor = connection.vendor
+        written = UserAnswer.objects.filter(question__quiz_set=quiz).count()
+        User.objects.filter(username__startswith=f"{tag}_").delete()
+        department.delete()
+
+        latencies.sort()
+        return {
+            'profile': profile,
+            'vendor': vendor,
+            'threads': options['threads'],
+            'answers': written,
+            'errors': len(errors),
+            'first_error': errors[0] if errors else None,
+            'elapsed_s': round(elapsed, 3),
+            'answers_per_s': round(written / elapsed, 2),
+            'p50_ms': round(percentile(latencies, 50), 2) if latencies else None,
+            'p95_ms': round(percentile(latencies, 95), 2) if latencies else None,
+            'p99_ms': round(percentile(latencies, 99), 2) if latencies else None,
+        }
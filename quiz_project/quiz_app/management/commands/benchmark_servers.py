@@ -0,0 +1,110 @@
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+
+from quiz_app.loadtest import HttpSession, run_load_test, seeded_population
+
+
+class Command(BaseCommand):
+    help = (
+        "Start gunicorn in sync WSGI and in ASGI (uvicorn worker) mode in turn, drive the same "
+        "simulated candidates through each, and compare completed attempts per second per core. "
+        "Needs data from seed_load_data in the configured database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--modes', nargs='+', choices=['wsgi', 'asgi'], default=['wsgi', 'asgi'])
+        parser.add_argument('--workers', type=int, default=1, help="Gunicorn workers, i.e. cores to use.")
+        parser.add_argument('--candidates', type=int, default=200)
+        parser.add_argument('--concurrency', type=int, default=50, help="Simultaneous simulated candidates.")
+        parser.add_argument('--prefix', default='load')
+        parser.add_argument('--password', default='loadtest')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', help="Write the JSON comparison to this file.")
+
+    def handle(self, *args, **options):
+        quiz_ids, users, _ = seeded_population(options['prefix'])
+        if not quiz_ids or len(users) < options['candidates'] * len(options['modes']):
+            raise CommandError("Not enough seeded quizzes or users; run seed_load_data first.")
+
+        # Each mode gets its own candidates so neither run resumes the other's attempts.
+        rng = random.Random(options['seed'])
+        users = rng.sample(users, options['candidates'] * len(options['modes']))
+
+        comparison = {}
+        for index, mode in enumerate(options['modes']):
+            candidates = users[index * options['candidates']:(index + 1) * options['candidates']]
+            self.stdout.write(f"Benchmarking {mode} with {options['workers']} worker(s)...")
+            with self.server(mode, options['workers']) as base_url:
+                report = run_load_test(
+                    candidates=candidates,
+                    staff=[],
+                    quiz_ids=quiz_ids,
+                    connect=lambda user: HttpSession(base_url, user.username, options['password']),
+                    concurrency=options['concurrency'],
+                    seed=options['seed'],
+                    mode=mode,
+                )
+            per_second = report['completed']['candidates'] / report['meta']['elapsed_s']
+            comparison[mode] = {
+                'workers': options['workers'],
+                'candidates_per_s': round(per_second, 2),
+                'candidates_per_s_per_core': round(per_second / options['workers'], 2),
+                'p95_ms': report['total']['p95_ms'],
+                'p99_ms': report['total']['p99_ms'],
+                'errors': report['total']['errors'],
+                'report': report,
+            }
+
+        self.stdout.write(f"{'mode':<6}{'cand/s':>10}{'per core':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}")
+        for mode, row in comparison.items():
+            self.stdout.write(
+                f"{mode:<6}{row['candidates_per_s']:>10}{row['candidates_per_s_per_core']:>10}"
+                f"{row['p95_ms']:>10}{row['p99_ms']:>10}{row['errors']:>8}"
+            )
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                json.dump(comparison, output, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Comparison written to {options['output']}"))
+
+    @contextmanager
+    def server(self, mode, workers):
+        with socket.socket() as probe:
+            probe.bind(('127.0.0.1', 0))
+            port = probe.getsockname()[1]
+        env = {**os.environ, 'SERVER_MODE': mode, 'WEB_CONCURRENCY': str(workers)}
+        env.pop('ASYNC_QUIZ_VIEWS', None)
+        process = subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', '--bind', f'127.0.0.1:{port}', '--workers', str(workers)],
+            cwd=settings.BASE_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        base_url = f'http://127.0.0.1:{port}'
+        try:
+            self.wait_until_up(base_url + reverse('login'), process)
+            yield base_url
+        finally:
+            process.terminate()
+            process.wait(timeout=30)
+
+    def wait_until_up(self, url, process, timeout=30):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise CommandError(f"gunicorn exited with status {process.returncode}")
+            try:
+                urllib.request.urlopen(url, timeout=1).close()
+                return
+            except (urllib.error.URLError, OSError):
+                time.sleep(0.2)
+        raise CommandError(f"gunicorn did not answer on {url} within {timeout}s")
@@ -0,0 +1,13 @@
+from django.contrib.staticfiles.management.commands.collectstatic import Command as CollectStaticCommand
+
+from quiz_app.images import build_catalog
+
+
+class Command(CollectStaticCommand):
+    """collectstatic that first builds the quiz image catalog, so the variants get collected too."""
+
+    def handle(self, **options):
+        catalog = build_catalog()
+        if options['verbosity'] >= 1:
+            self.stdout.write(f"Catalogued {len(catalog)} quiz images.")
+        return super().handle(**options)
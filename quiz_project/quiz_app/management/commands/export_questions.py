@@ -0,0 +1,35 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from quiz_app.bank import BANK_EXPORT_FORMATS
+from quiz_app.models import Question, QuizSet
+
+
+class Command(BaseCommand):
+    help = "Stream question banks to a CSV, XLSX or JSON Lines file that import_questions reads back."
+
+    def add_arguments(self, parser):
+        parser.add_argument('output', help="Path of the file to write, or - for stdout.")
+        parser.add_argument('--format', choices=sorted(BANK_EXPORT_FORMATS), default='jsonl')
+        parser.add_argument('--quiz', type=int, action='append', help="QuizSet id; repeat for several.")
+        parser.add_argument('--department', type=int, help="Department id.")
+
+    def handle(self, *args, **options):
+        quizzes = QuizSet.objects.all()
+        if options['quiz']:
+            quizzes = quizzes.filter(pk__in=options['quiz'])
+        if options['department']:
+            quizzes = quizzes.filter(department_id=options['department'])
+        _, stream = BANK_EXPORT_FORMATS[options['format']]
+
+        output = sys.stdout.buffer if options['output'] == '-' else open(options['output'], 'wb')
+        try:
+            for chunk in stream(quizzes):
+                output.write(chunk)
+        finally:
+            if output is not sys.stdout.buffer:
+                output.close()
+
+        count = Question.objects.filter(quiz_set__in=quizzes).count()
+        self.stderr.write(self.style.SUCCESS(f"Exported {count} questions."))
@@ -0,0 +1,43 @@
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from quiz_app.exports import filter_results, stream_pdf_zip
+from quiz_app.models import QuizResult
+
+
+class Command(BaseCommand):
+    help = "Write the PDFs of a filtered set of results to one ZIP, rendering any not yet stored."
+
+    def add_arguments(self, parser):
+        parser.add_argument('output', help="Path of the ZIP to write, or - for stdout.")
+        parser.add_argument('--department', type=int, help="Department id.")
+        parser.add_argument('--quiz', type=int, help="QuizSet id.")
+        parser.add_argument('--since', help="First day to include (YYYY-MM-DD).")
+        parser.add_argument('--until', help="Last day to include (YYYY-MM-DD).")
+        parser.add_argument('--status', choices=[choice for choice, _ in QuizResult.STATUS_CHOICES])
+        parser.add_argument(
+            '--workers', type=int, default=settings.PDF_EXPORT_WORKERS,
+            help="Render processes (1 renders inline).",
+        )
+
+    def handle(self, *args, **options):
+        results = filter_results(
+            department=options['department'], quiz=options['quiz'],
+            since=options['since'], until=options['until'], status=options['status'],
+        )
+
+        stats = {}
+        output = sys.stdout.buffer if options['output'] == '-' else open(options['output'], 'wb')
+        try:
+            for chunk in stream_pdf_zip(results, workers=options['workers'], stats=stats):
+                output.write(chunk)
+        finally:
+            if output is not sys.stdout.buffer:
+                output.close()
+
+        self.stderr.write(self.style.SUCCESS(
+            f"Exported {stats['count']} PDFs ({stats['rendered']} rendered) in {stats['elapsed']:.1f}s "
+            f"({stats['rate']:.1f} PDFs/s)."
+        ))
@@ -0,0 +1,45 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from quiz_app.exports import EXPORT_FORMATS, filter_results, tabular_rows
+from quiz_app.models import QuizResult
+
+
+class Command(BaseCommand):
+    help = "Stream quiz results (or their answers) to a CSV or XLSX file."
+
+    def add_arguments(self, parser):
+        parser.add_argument('output', help="Path of the file to write, or - for stdout.")
+        parser.add_argument('--format', choices=sorted(EXPORT_FORMATS), default='csv')
+        parser.add_argument('--answers', action='store_true', help="Export one row per UserAnswer.")
+        parser.add_argument('--department', type=int, help="Department id.")
+        parser.add_argument('--quiz', type=int, help="QuizSet id.")
+        parser.add_argument('--since', help="First day to include (YYYY-MM-DD).")
+        parser.add_argument('--until', help="Last day to include (YYYY-MM-DD).")
+        parser.add_argument('--status', choices=[choice for choice, _ in QuizResult.STATUS_CHOICES])
+
+    def handle(self, *args, **options):
+        results = filter_results(
+            department=options['department'], quiz=options['quiz'],
+            since=options['since'], until=options['until'], status=options['status'],
+        )
+        _, stream = EXPORT_FORMATS[options['format']]
+
+        rows = 0
+
+        def counted(source):
+            nonlocal rows
+            for row in source:
+                rows += 1
+                yield row
+
+        output = sys.stdout.buffer if options['output'] == '-' else open(options['output'], 'wb')
+        try:
+            for chunk in stream(counted(tabular_rows(results, answers=options['answers']))):
+                output.write(chunk)
+        finally:
+            if output is not sys.stdout.buffer:
+                output.close()
+
+        self.stderr.write(self.style.SUCCESS(f"Exported {max(rows - 1, 0)} rows."))
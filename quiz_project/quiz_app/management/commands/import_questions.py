@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from quiz_app.bank import READERS, BankError, format_for, import_bank
+
+
+class Command(BaseCommand):
+    help = (
+        "Import a CSV, JSON, JSON Lines or XLSX question bank (layout in quiz_app/bank.py). "
+        "Every row is validated before anything is written; questions already in their quiz are skipped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=sorted(READERS), help="Defaults to the file's extension.")
+        parser.add_argument('--dry-run', action='store_true', help="Only validate the file.")
+        parser.add_argument('--batch-size', type=int, default=500, help="Questions per bulk insert.")
+
+    def handle(self, *args, **options):
+        bank_format = options['format'] or format_for(options['path'])
+        if bank_format is None:
+            raise CommandError("Cannot tell the format from the file name; pass --format.")
+        try:
+            with open(options['path'], 'rb') as bank:
+                stats = import_bank(bank, bank_format, batch_size=options['batch_size'], dry_run=options['dry_run'])
+        except BankError as error:
+            for message in error.errors:
+                self.stderr.write(message)
+            raise CommandError(f"{options['path']} was not imported.")
+
+        if options['dry_run']:
+            self.stdout.write(self.style.SUCCESS(f"{stats['rows']} rows are valid ({stats['rate']:.0f} rows/s)."))
+            return
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {stats['questions']} questions and {stats['choices']} choices into {stats['quizzes']} "
+            f"quizzes, skipped {stats['skipped']} already present, in {stats['elapsed']:.2f}s "
+            f"({stats['rate']:.0f} rows/s)."
+        ))
@@ -0,0 +1,51 @@
+from datetime import timedelta
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from quiz_app.models import QuizResult
+
+PDF_DIR = 'pdfs'
+
+
+class Command(BaseCommand):
+    help = "Delete result PDFs in media/pdfs that no QuizResult.pdf_file references."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help="Only report what would be deleted.")
+        parser.add_argument(
+            '--min-age', type=int, default=60,
+            help="Skip files younger than this many minutes (renders still being saved).",
+        )
+
+    def handle(self, *args, **options):
+        referenced = set(
+            QuizResult.objects.exclude(pdf_file__isnull=True).exclude(pdf_file='')
+            .values_list('pdf_file', flat=True).iterator()
+        )
+        cutoff = timezone.now() - timedelta(minutes=options['min_age'])
+
+        try:
+            _, filenames = default_storage.listdir(PDF_DIR)
+        except FileNotFoundError:
+            filenames = []
+
+        orphans = 0
+        reclaimed = 0
+        for filename in sorted(filenames):
+            name = f"{PDF_DIR}/{filename}"
+            if name in referenced or default_storage.get_modified_time(name) > cutoff:
+                continue
+            size = default_storage.size(name)
+            orphans += 1
+            reclaimed += size
+            if options['dry_run']:
+                self.stdout.write(f"would delete {name} ({size} bytes)")
+            else:
+                default_storage.delete(name)
+
+        verb = "Would reclaim" if options['dry_run'] else "Reclaimed"
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {reclaimed} bytes from {orphans} orphaned PDFs ({len(referenced)} referenced)."
+        ))
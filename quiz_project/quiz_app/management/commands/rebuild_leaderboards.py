@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from quiz_app.leaderboard import rebuild_leaderboards
+
+
+class Command(BaseCommand):
+    help = "Recompute every quiz and department leaderboard from the finished attempts."
+
+    def handle(self, *args, **options):
+        counts = rebuild_leaderboards()
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt {counts['quiz']} quiz and {counts['department']} department leaderboard entries."
+        ))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from quiz_app.models import QuizResult
+from quiz_app.scoring import refresh_summaries
+
+
+class Command(BaseCommand):
+    help = "Recompute the per-attempt score summaries from answers and questions."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--quiz', type=int, help="Only rebuild results of this QuizSet id.")
+
+    def handle(self, *args, **options):
+        results = QuizResult.objects.all()
+        if options['quiz']:
+            results = results.filter(quiz_id=options['quiz'])
+
+        count = refresh_summaries(results)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {count} result summaries."))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from quiz_app.search import rebuild_index
+
+
+class Command(BaseCommand):
+    help = (
+        "Re-create the full-text search triggers and re-index every question, choice and "
+        "written answer. Only does anything on SQLite, where migrate already does this when a "
+        "migration dropped the triggers."
+    )
+
+    def handle(self, *args, **options):
+        rebuild_index()
+        self.stdout.write(self.style.SUCCESS("Search index rebuilt."))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from quiz_app.images import build_catalog, variants_dir
+
+
+class Command(BaseCommand):
+    help = "Rescan the quiz image folder, regenerate missing variants and rewrite the catalog."
+
+    def handle(self, *args, **options):
+        catalog = build_catalog()
+        self.stdout.write(self.style.SUCCESS(
+            f"Catalogued {len(catalog)} quiz images into {variants_dir()}. "
+            "Restart the web processes so they load the new catalog."
+        ))
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from quiz_app.analytics import refresh_item_stats
+from quiz_app.models import QuizSet
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild per-question difficulty, discrimination and choice statistics for quizzes "
+        "with new finished attempts or grades (or for every quiz with --all)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--quiz', type=int, action='append', help="QuizSet id to rebuild (repeatable).")
+        parser.add_argument('--all', action='store_true', help="Rebuild every quiz, stale or not.")
+
+    def handle(self, *args, **options):
+        quiz_ids = options['quiz']
+        if options['all']:
+            quiz_ids = list(QuizSet.objects.values_list('id', flat=True))
+
+        refreshed = refresh_item_stats(quiz_ids)
+        self.stdout.write(self.style.SUCCESS(f"Refreshed item statistics of {len(refreshed)} quizzes."))
@@ -0,0 +1,62 @@
+import json
+import random
+
+from django.core.management.base import BaseCommand, CommandError
+
+from quiz_app.loadtest import ClientSession, HttpSession, run_load_test, seeded_population
+
+
+class Command(BaseCommand):
+    help = (
+        "Simulate candidates taking quizzes and staff grading them, then report "
+        "throughput and p50/p95/p99 latency per URL. Users come from seed_load_data; "
+        "without --base-url the app runs in-process against the configured database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--base-url', help="Benchmark a running server, e.g. http://localhost:8000.")
+        parser.add_argument('--candidates', type=int, default=100, help="Simulated quiz attempts.")
+        parser.add_argument('--staff', type=int, default=5, help="Simulated grading sessions.")
+        parser.add_argument('--concurrency', type=int, default=10)
+        parser.add_argument('--quiz', type=int, action='append', help="QuizSet id to use (repeatable).")
+        parser.add_argument('--prefix', default='load', help="Username prefix used by seed_load_data.")
+        parser.add_argument('--password', default='loadtest', help="Password for --base-url logins.")
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', help="Write the JSON report to this file.")
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        quiz_ids, candidates, staff = seeded_population(options['prefix'])
+        quiz_ids = options['quiz'] or quiz_ids
+        if not quiz_ids or len(candidates) < options['candidates'] or (options['staff'] and not staff):
+            raise CommandError("Not enough seeded quizzes or users; run seed_load_data first.")
+
+        if options['base_url']:
+            mode = 'http'
+
+            def connect(user):
+                return HttpSession(options['base_url'], user.username, options['password'])
+        else:
+            mode = 'in-process'
+            connect = ClientSession
+
+        report = run_load_test(
+            candidates=rng.sample(candidates, options['candidates']),
+            staff=[rng.choice(staff) for _ in range(options['staff'])],
+            quiz_ids=quiz_ids,
+            connect=connect,
+            concurrency=options['concurrency'],
+            seed=options['seed'],
+            mode=mode,
+        )
+
+        self.stdout.write(f"{'URL':<28}{'count':>7}{'errors':>7}{'req/s':>9}{'p50':>9}{'p95':>9}{'p99':>9}")
+        for label, stats in report['urls'].items():
+            self.stdout.write(
+                f"{label:<28}{stats['count']:>7}{stats['errors']:>7}{stats['throughput_rps']:>9}"
+                f"{stats['p50_ms']:>9}{stats['p95_ms']:>9}{stats['p99_ms']:>9}"
+            )
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                json.dump(report, output, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Report written to {options['output']}"))
@@ -0,0 +1,32 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from quiz_app import jobs
+
+
+class Command(BaseCommand):
+    help = "Run the background job worker (result PDFs, grade suggestions, item statistics)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--concurrency', type=int, default=settings.JOB_WORKER_CONCURRENCY,
+            help="Number of worker threads.",
+        )
+        parser.add_argument(
+            '--poll-interval', type=float, default=settings.JOB_POLL_INTERVAL,
+            help="Seconds to sleep when the queue is empty.",
+        )
+        parser.add_argument('--once', action='store_true', help="Drain the queue once and exit.")
+
+    def handle(self, *args, **options):
+        if options['once']:
+            jobs.requeue_stale_jobs()
+            processed = jobs.run_until_empty()
+            self.stdout.write(self.style.SUCCESS(f"Processed {processed} jobs."))
+            return
+
+        self.stdout.write(
+            f"Worker started with {options['concurrency']} threads, "
+            f"polling every {options['poll_interval']}s."
+        )
+        jobs.work(concurrency=options['concurrency'], poll_interval=options['poll_interval'])
@@ -0,0 +1,178 @@
+import random
+import time
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from quiz_app import papers, sidebar
+from quiz_app.leaderboard import rebuild_leaderboards
+from quiz_app.models import Choice, Department, Question, QuizResult, QuizSet, UserAnswer
+from quiz_app.scoring import refresh_summaries
+
+WORDS = (
+    "network router switch packet latency bandwidth fiber subscriber billing tariff "
+    "antenna signal outage ticket customer modem protocol gateway firewall backbone"
+).split()
+
+
+class Command(BaseCommand):
+    help = (
+        "Fill the database with synthetic departments, quizzes, users and attempts "
+        "for load testing. Never run this against production."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--prefix', default='load', help="Prefix of generated usernames and titles.")
+        parser.add_argument('--departments', type=int, default=5)
+        parser.add_argument('--quizzes', type=int, default=4, help="Quiz sets per department.")
+        parser.add_argument('--mcq', type=int, default=15, help="MCQ questions per quiz.")
+        parser.add_argument('--text', type=int, default=3, help="Written questions per quiz.")
+        parser.add_argument('--choices', type=int, default=4, help="Choices per MCQ question.")
+        parser.add_argument('--users', type=int, default=20000)
+        parser.add_argument('--staff', type=int, default=10)
+        parser.add_argument('--attempts', type=int, default=3, help="Finished attempts per user.")
+        parser.add_argument('--graded', type=float, default=0.7, help="Share of attempts already graded.")
+        parser.add_argument('--days', type=int, default=90, help="Spread attempts over this many days.")
+        parser.add_argument('--password', default='loadtest', help="Password of every generated user.")
+        parser.add_argument('--batch-size', type=int, default=500, help="Attempts written per transaction.")
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        started = time.monotonic()
+
+        quizzes = self.create_quizzes(options)
+        users = self.create_users(options)
+        results, answers = self.create_attempts(users, quizzes, options)
+        # bulk_create skips the signals that queue leaderboard updates.
+        boards = rebuild_leaderboards()
+        self.stdout.write(f"  {boards['quiz']} quiz and {boards['department']} department leaderboard entries")
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded {len(quizzes)} quizzes, {len(users)} users, {results} results and "
+            f"{answers} answers in {elapsed:.1f}s ({(results + answers) / elapsed:.0f} rows/s)."
+        ))
+
+    def create_quizzes(self, options):
+        prefix = options['prefix']
+        departments = Department.objects.bulk_create(
+            Department(name=f"{prefix} department {d}") for d in range(options['departments'])
+        )
+        sidebar.bump_version()  # bulk_create skips the signal that does this
+        quizzes = QuizSet.objects.bulk_create(
+            QuizSet(title=f"{prefix} quiz {d.id}-{q}", department=d)
+            for d in departments for q in range(options['quizzes'])
+        )
+
+        questions = Question.objects.bulk_create(
+            Question(
+                quiz_set=quiz,
+                text=f"{' '.join(self.rng.sample(WORDS, 6)).capitalize()}?",
+                question_type=question_type,
+            )
+            for quiz in quizzes
+            for question_type in ['MCQ'] * options['mcq'] + ['TEXT'] * options['text']
+        )
+        Choice.objects.bulk_create(
+            Choice(question=question, text=' '.join(self.rng.sample(WORDS, 3)), is_correct=c == 0)
+            for question in questions if question.question_type == 'MCQ'
+            for c in range(options['choices'])
+        )
+
+        # Keep the generated structure in memory; attempts are built from it
+        # without reading anything back. The first choice is the correct one.
+        choices = {}
+        for choice in Choice.objects.filter(question__quiz_set__in=quizzes).order_by('id'):
+            choices.setdefault(choice.question_id, []).append(choice)
+        by_quiz = {quiz.id: quiz for quiz in quizzes}
+        for quiz in quizzes:
+            papers.bump_version(quiz.id)
+            quiz.seed_questions = []
+        for question in questions:
+            question.seed_choices = choices.get(question.id, [])
+            by_quiz[question.quiz_set_id].seed_questions.append(question)
+        return quizzes
+
+    def create_users(self, options):
+        prefix = options['prefix']
+        # Hashing is deliberately slow, so every generated user shares one hash.
+        password = make_password(options['password'])
+        User.objects.bulk_create(
+            [User(username=f"{prefix}_staff_{n:04d}", password=password, is_staff=True)
+             for n in range(options['staff'])]
+            + [User(username=f"{prefix}_user_{n:06d}", password=password) for n in range(options['users'])],
+            ignore_conflicts=True,
+        )
+        return list(User.objects.filter(username__startswith=f"{prefix}_user_").order_by('id'))
+
+    def create_attempts(self, users, quizzes, options):
+        now = timezone.now()
+        total_results = total_answers = 0
+        pending = []
+
+        def flush():
+            nonlocal total_results, total_answers
+            with transaction.atomic():
+                results = QuizResult.objects.bulk_create([result for result, _ in pending])
+                answers = []
+                for result, attempt_answers in pending:
+                    for answer in attempt_answers:
+                        answer.quiz_result = result
+                        answers.append(answer)
+                UserAnswer.objects.bulk_create(answers)
+                # bulk_create skips the signals that maintain summaries.
+                refresh_summaries([result.id for result in results])
+            total_results += len(results)
+            total_answers += len(answers)
+            pending.clear()
+            self.stdout.write(f"  {total_results} results, {total_answers} answers")
+
+        for user in users:
+            skill = self.rng.uniform(0.3, 0.95)
+            for _ in range(options['attempts']):
+                quiz = self.rng.choice(quizzes)
+                pending.append(self.attempt(user, quiz, skill, now, options))
+                if len(pending) >= self.batch_size:
+                    flush()
+        if pending:
+            flush()
+        return total_results, total_answers
+
+    def attempt(self, user, quiz, skill, now, options):
+        graded = self.rng.random() < options['graded']
+        answers = []
+        score = 0
+        for question in quiz.seed_questions:
+            answer = UserAnswer(user=user, question=question)
+            if question.question_type == 'MCQ':
+                correct = self.rng.random() < skill
+                choices = question.seed_choices
+                answer.selected_choice = choices[0] if correct else self.rng.choice(choices[1:] or choices)
+                score += correct
+            else:
+                answer.written_answer = ' '.join(self.rng.choices(WORDS, k=self.rng.randint(5, 40)))
+                if graded:
+                    answer.grade = round(min(100, max(0, self.rng.gauss(skill * 100, 15))))
+            answers.append(answer)
+
+        start_time = now - timedelta(days=self.rng.uniform(0, options['days']))
+        time_taken = timedelta(seconds=self.rng.randint(120, 3600))
+        result = QuizResult(
+            user=user,
+            quiz=quiz,
+            department_id=quiz.department_id,
+            score=score,
+            answered_count=len(answers),
+            start_time=start_time,
+            end_time=start_time + time_taken,
+            time_taken=time_taken,
+            created_at=start_time,
+            status=self.rng.choice(['Pass', 'Fail']) if graded else 'Pending',
+        )
+        return result, answers
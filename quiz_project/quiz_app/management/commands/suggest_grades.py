@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from quiz_app.autograde import suggest_grades
+from quiz_app.models import UserAnswer
+
+
+class Command(BaseCommand):
+    help = (
+        "Suggest grades for ungraded written answers from their question's reference answer "
+        "and keywords, e.g. after those were added or changed."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--question', type=int, help="Only answers to this Question id.")
+        parser.add_argument('--all', action='store_true', help="Also redo answers that have a suggestion.")
+
+    def handle(self, *args, **options):
+        answers = UserAnswer.objects.filter(grade__isnull=True)
+        if options['question']:
+            answers = answers.filter(question_id=options['question'])
+        if not options['all']:
+            answers = answers.filter(suggested_grade__isnull=True)
+
+        count = suggest_grades(answers)
+        self.stdout.write(self.style.SUCCESS(f"Suggested grades for {count} answers."))
@@ -0,0 +1,72 @@
+# Generated by Django 5.2.3 on 2026-10-18 14:50
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def backfill_summaries(apps, schema_editor):
+    QuizResult = apps.get_model('quiz_app', 'QuizResult')
+    Question = apps.get_model('quiz_app', 'Question')
+    UserAnswer = apps.get_model('quiz_app', 'UserAnswer')
+    QuizResultSummary = apps.get_model('quiz_app', 'QuizResultSummary')
+
+    totals = {}
+    for row in Question.objects.values('quiz_set_id', 'question_type').annotate(n=Count('id')):
+        totals.setdefault(row['quiz_set_id'], {})[row['question_type']] = row['n']
+
+    correct = dict(
+        UserAnswer.objects.filter(question__question_type='MCQ', selected_choice__is_correct=True)
+        .values('quiz_result_id').annotate(n=Count('id')).values_list('quiz_result_id', 'n')
+    )
+    graded = {
+        row['quiz_result_id']: (row['s'], row['n'])
+        for row in UserAnswer.objects.filter(question__question_type='TEXT', grade__isnull=False)
+        .values('quiz_result_id').annotate(s=Sum('grade'), n=Count('id'))
+    }
+
+    summaries = []
+    for result_id, quiz_id in QuizResult.objects.values_list('id', 'quiz_id').iterator():
+        mcq_total = totals.get(quiz_id, {}).get('MCQ', 0)
+        written_total = totals.get(quiz_id, {}).get('TEXT', 0)
+        mcq_correct = correct.get(result_id, 0)
+        graded_sum, graded_count = graded.get(result_id, (0, 0))
+        is_fully_graded = graded_count >= written_total
+        summaries.append(QuizResultSummary(
+            quiz_result_id=result_id,
+            mcq_correct=mcq_correct,
+            mcq_total=mcq_total,
+            written_graded_sum=graded_sum,
+            written_graded_count=graded_count,
+            written_total=written_total,
+            mcq_percent=(mcq_correct / mcq_total) * 100 if mcq_total else 0,
+            written_percent=graded_sum / written_total if written_total and is_fully_graded else None,
+            is_fully_graded=is_fully_graded,
+        ))
+    QuizResultSummary.objects.bulk_create(summaries, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz_app', '0017_remove_question_image_question_image_name'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QuizResultSummary',
+            fields=[
+                ('quiz_result', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='summary', serialize=False, to='quiz_app.quizresult')),
+                ('mcq_correct', models.IntegerField(default=0)),
+                ('mcq_total', models.IntegerField(default=0)),
+                ('written_graded_sum', models.FloatField(default=0)),
+                ('written_graded_count', models.IntegerField(default=0)),
+                ('written_total', models.IntegerField(default=0)),
+                ('mcq_percent', models.FloatField(default=0)),
+                ('written_percent', models.FloatField(blank=True, null=True)),
+                ('is_fully_graded', models.BooleanField(default=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.RunPython(backfill_summaries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.3 on 2026-10-18 14:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz_app', '0019_backgroundjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='quizresult',
+            name='pdf_digest',
+            field=models.CharField(blank=True, max_length=64),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.3 on 2026-10-18 14:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz_app', '0020_quizresult_pdf_digest'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='quizset',
+            name='single_page',
+            field=models.BooleanField(default=False, verbose_name='Show all questions on one page'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.3 on 2026-10-18 14:58
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_answered_count(apps, schema_editor):
+    QuizResult = apps.get_model('quiz_app', 'QuizResult')
+    UserAnswer = apps.get_model('quiz_app', 'UserAnswer')
+    answers = (
+        UserAnswer.objects.filter(quiz_result=OuterRef('pk')).order_by()
+        .values('quiz_result').annotate(c=Count('id')).values('c')
+    )
+    QuizResult.objects.update(answered_count=Coalesce(Subquery(answers, output_field=IntegerField()), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz_app', '0021_quizset_single_page'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='quizresult',
+            name='answered_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_answered_count, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.3 on 2026-10-18 15:17
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz_app', '0023_hot_path_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='useranswer',
+            index=models.Index(condition=models.Q(('grade__isnull', True)), fields=['question', 'id'], name='answer_question_ungraded_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='useranswer',
+            index=models.Index(fields=['question', 'id'], name='answer_question_id_idx'),
+        ),
+    ]
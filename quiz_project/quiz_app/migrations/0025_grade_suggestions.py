@@ -0,0 +1,33 @@
+# Generated by Django 5.2.3 on 2026-10-18 15:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz_app', '0024_grading_queue_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='question',
+            name='keywords',
+            field=models.CharField(blank=True, help_text='Comma-separated terms a good written answer mentions; used to suggest grades.', max_length=500, verbose_name='Keywords'),
+        ),
+        migrations.AddField(
+            model_name='question',
+            name='reference_answer',
+            field=models.TextField(blank=True, help_text='Model answer for written questions; used to suggest grades.', verbose_name='Reference Answer'),
+        ),
+        migrations.AddField(
+            model_name='useranswer',
+            name='suggested_grade',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='backgroundjob',
+            name='kind',
+            field=models.CharField(choices=[('render_pdf', 'Render result PDF'), ('autograde', 'Suggest written grades')], max_length=30),
+        ),
+    ]
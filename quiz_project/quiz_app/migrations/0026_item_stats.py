@@ -0,0 +1,49 @@
+# Generated by Django 5.2.3 on 2026-10-18 15:23
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz_app', '0025_grade_suggestions'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QuestionStats',
+            fields=[
+                ('question', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='quiz_app.question')),
+                ('responses', models.IntegerField(default=0)),
+                ('percent_correct', models.FloatField(blank=True, null=True)),
+                ('discrimination', models.FloatField(blank=True, null=True)),
+                ('average_grade', models.FloatField(blank=True, null=True)),
+                ('graded_count', models.IntegerField(default=0)),
+                ('choice_counts', models.JSONField(blank=True, default=dict)),
+                ('refreshed_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='QuizStats',
+            fields=[
+                ('quiz', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='quiz_app.quizset')),
+                ('attempts', models.IntegerField(default=0)),
+                ('mean_score', models.FloatField(blank=True, null=True)),
+                ('percent_correct', models.FloatField(blank=True, null=True)),
+                ('average_grade', models.FloatField(blank=True, null=True)),
+                ('refreshed_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='quizresult',
+            index=models.Index(fields=['quiz', 'end_time'], name='result_quiz_end_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='quizresultsummary',
+            index=models.Index(fields=['updated_at'], name='summary_updated_idx'),
+        ),
+    ]
@@ -0,0 +1,106 @@
+# Generated by Django 5.2.3 on 2026-10-18 15:25
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Avg, Count, ExpressionWrapper, F, FloatField, Max, Q, Window
+from django.db.models.functions import Coalesce, NullIf, Rank
+
+
+def backfill_leaderboards(apps, schema_editor):
+    # A frozen copy of leaderboard.rebuild_leaderboards(), so later changes
+    # to that module cannot change what this migration does.
+    QuizResult = apps.get_model('quiz_app', 'QuizResult')
+    score = ExpressionWrapper(
+        (F('summary__mcq_correct') + F('summary__written_graded_sum') / 100.0) * 100.0
+        / NullIf(F('summary__mcq_total') + F('summary__written_total'), 0),
+        output_field=FloatField(),
+    )
+    for model_name, scope in (('QuizLeaderboardEntry', 'quiz'), ('DepartmentLeaderboardEntry', 'department')):
+        model = apps.get_model('quiz_app', model_name)
+        rows = (
+            QuizResult.objects.filter(end_time__isnull=False, **{f'{scope}__isnull': False})
+            .values(f'{scope}_id', 'user_id').order_by()
+            .annotate(
+                attempts=Count('id'),
+                best_score=Coalesce(Max(score), 0.0),
+                average_score=Coalesce(Avg(score), 0.0),
+                passed=Count('id', filter=Q(status='Pass')),
+            )
+        )
+        model.objects.bulk_create([
+            model(
+                **{f'{scope}_id': row[f'{scope}_id']},
+                user_id=row['user_id'],
+                attempts=row['attempts'],
+                best_score=row['best_score'],
+                average_score=row['average_score'],
+                passed=row['passed'],
+                pass_rate=row['passed'] * 100 / row['attempts'],
+            )
+            for row in rows
+        ], batch_size=1000)
+        ranked = model.objects.annotate(
+            new_rank=Window(
+                Rank(), partition_by=[F(f'{scope}_id')],
+                order_by=[F('best_score').desc(), F('average_score').desc()],
+            )
+        ).values_list('id', 'new_rank')
+        model.objects.bulk_update(
+            [model(id=entry_id, rank=rank) for entry_id, rank in ranked], ['rank'], batch_size=1000,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz_app', '0026_item_stats'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='backgroundjob',
+            name='kind',
+            field=models.CharField(choices=[('render_pdf', 'Render result PDF'), ('autograde', 'Suggest written grades'), ('leaderboard', 'Update leaderboards')], max_length=30),
+        ),
+        migrations.CreateModel(
+            name='DepartmentLeaderboardEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('attempts', models.IntegerField(default=0)),
+                ('best_score', models.FloatField(default=0)),
+                ('average_score', models.FloatField(default=0)),
+                ('passed', models.IntegerField(default=0)),
+                ('pass_rate', models.FloatField(default=0)),
+                ('rank', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('department', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='leaderboard', to='quiz_app.department')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['department', 'rank', 'user'], name='dept_leaderboard_rank_idx')],
+                'constraints': [models.UniqueConstraint(fields=('department', 'user'), name='unique_department_leaderboard_user')],
+            },
+        ),
+        migrations.CreateModel(
+            name='QuizLeaderboardEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('attempts', models.IntegerField(default=0)),
+                ('best_score', models.FloatField(default=0)),
+                ('average_score', models.FloatField(default=0)),
+                ('passed', models.IntegerField(default=0)),
+                ('pass_rate', models.FloatField(default=0)),
+                ('rank', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('quiz', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='leaderboard', to='quiz_app.quizset')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['quiz', 'rank', 'user'], name='quiz_leaderboard_rank_idx')],
+                'constraints': [models.UniqueConstraint(fields=('quiz', 'user'), name='unique_quiz_leaderboard_user')],
+            },
+        ),
+        migrations.RunPython(backfill_leaderboards, migrations.RunPython.noop),
+    ]
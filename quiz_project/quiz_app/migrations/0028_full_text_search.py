@@ -0,0 +1,63 @@
+from django.db import migrations
+
+# (table, searched column) at the time of this migration. The SQL is spelled
+# out here rather than taken from quiz_app.search, so later changes to that
+# module cannot change what this migration does.
+TARGETS = [
+    ('quiz_app_question', 'text'),
+    ('quiz_app_choice', 'text'),
+    ('quiz_app_useranswer', 'written_answer'),
+]
+
+
+def install(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    for table, column in TARGETS:
+        if vendor == 'sqlite':
+            fts = f'{table}_fts'
+            schema_editor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+                f"{column}, content='{table}', content_rowid='id', tokenize='unicode61 remove_diacritics 2')"
+            )
+            schema_editor.execute(
+                f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN "
+                f"INSERT INTO {fts}(rowid, {column}) VALUES (new.id, new.{column}); END"
+            )
+            schema_editor.execute(
+                f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN "
+                f"INSERT INTO {fts}({fts}, rowid, {column}) VALUES ('delete', old.id, old.{column}); END"
+            )
+            schema_editor.execute(
+                f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {column} ON {table} BEGIN "
+                f"INSERT INTO {fts}({fts}, rowid, {column}) VALUES ('delete', old.id, old.{column}); "
+                f"INSERT INTO {fts}(rowid, {column}) VALUES (new.id, new.{column}); END"
+            )
+            schema_editor.execute(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+        elif vendor == 'postgresql':
+            schema_editor.execute(
+                f"CREATE INDEX IF NOT EXISTS {table}_fts ON {table} "
+                f"USING GIN (to_tsvector('simple', coalesce({column}, '')))"
+            )
+
+
+def uninstall(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    for table, column in TARGETS:
+        if vendor == 'sqlite':
+            fts = f'{table}_fts'
+            for suffix in ('ai', 'ad', 'au'):
+                schema_editor.execute(f"DROP TRIGGER IF EXISTS {fts}_{suffix}")
+            schema_editor.execute(f"DROP TABLE IF EXISTS {fts}")
+        elif vendor == 'postgresql':
+            schema_editor.execute(f"DROP INDEX IF EXISTS {table}_fts")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz_app', '0027_leaderboards'),
+    ]
+
+    operations = [
+        migrations.RunPython(install, uninstall),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.3 on 2026-10-18 15:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz_app', '0028_full_text_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='quizresult',
+            name='question_order',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name='quizset',
+            name='sample_size',
+            field=models.PositiveIntegerField(blank=True, help_text='Draw this many questions at random for each attempt; leave empty to use every question.', null=True, verbose_name='Questions per attempt'),
+        ),
+        migrations.AddField(
+            model_name='quizset',
+            name='shuffle_questions',
+            field=models.BooleanField(default=False, verbose_name='Shuffle question order for each attempt'),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.3 on 2026-10-18 16:17
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz_app', '0030_database_cache_versions'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='departmentleaderboardentry',
+            name='dept_leaderboard_rank_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='quizleaderboardentry',
+            name='quiz_leaderboard_rank_idx',
+        ),
+        migrations.RemoveField(
+            model_name='departmentleaderboardentry',
+            name='rank',
+        ),
+        migrations.RemoveField(
+            model_name='quizleaderboardentry',
+            name='rank',
+        ),
+        migrations.AddIndex(
+            model_name='departmentleaderboardentry',
+            index=models.Index(fields=['department', '-best_score', '-average_score', 'user'], name='dept_leaderboard_score_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='quizleaderboardentry',
+            index=models.Index(fields=['quiz', '-best_score', '-average_score', 'user'], name='quiz_leaderboard_score_idx'),
+        ),
+    ]
@@ -1,19 +1,20 @@
-import os
 from django.utils.translation import gettext_lazy as _
 from django.db import models
+from django.db.models import Count, FloatField, IntegerField, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce
 from django.contrib.auth.models import User
 from django.utils import timezone
-from django.conf import settings
+
+from .images import image_names
+
 
 def get_quiz_images():
-    images_dir = os.path.join(settings.BASE_DIR, 'quiz_app', 'static', 'quiz_images')
-    try:
-        return [(filename, filename) for filename in os.listdir(images_dir) if filename.lower().endswith(('.png', '.jpg', '.jpeg', '.gif'))]
-    except FileNotFoundError:
-        return []
+    # Read from the image catalog, which lists the folder once per process.
+    return [(filename, filename) for filename in image_names()]
 
 class Department(models.Model):
     name = models.CharField("Department Name", max_length=100)
+    updated_at = models.DateTimeField(auto_now=True)
 
     @property
     def translated_name(self):
@@ -29,9 +30,27 @@ class Department(models.Model):
 
 
 
+class CacheVersion(models.Model):
+    """A named version counter shared by every process; see sidebar.bump_version."""
+    name = models.CharField(max_length=50, primary_key=True)
+    version = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.name} v{self.version}"
+
+
 class QuizSet(models.Model):
     title = models.CharField("Quiz Title", max_length=100)
     department = models.ForeignKey(Department, on_delete=models.CASCADE)
+    single_page = models.BooleanField("Show all questions on one page", default=False)
+    sample_size = models.PositiveIntegerField(
+        "Questions per attempt", null=True, blank=True,
+        help_text="Draw this many questions at random for each attempt; leave empty to use every question.",
+    )
+    shuffle_questions = models.BooleanField("Shuffle question order for each attempt", default=False)
+    # Bumped whenever the quiz or its questions change (see papers.bump_version);
+    # every process compares it with the paper it has compiled.
+    paper_version = models.BigIntegerField(default=0, editable=False)
 
     def __str__(self):
         return f"{self.department.name} - {self.title}"
@@ -47,6 +66,19 @@ class Question(models.Model):
     text = models.TextField("Question Text")
     image_name = models.CharField("Optional Image", max_length=255, choices=get_quiz_images, blank=True, null=True)
     question_type = models.CharField("Question Type", max_length=10, choices=QUESTION_TYPES, default='MCQ')
+    reference_answer = models.TextField(
+        "Reference Answer", blank=True, help_text="Model answer for written questions; used to suggest grades."
+    )
+    keywords = models.CharField(
+        "Keywords", max_length=500, blank=True,
+        help_text="Comma-separated terms a good written answer mentions; used to suggest grades.",
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['quiz_set', 'id'], name='question_quiz_id_idx'),
+            models.Index(fields=['quiz_set', 'question_type'], name='question_quiz_type_idx'),
+        ]
 
     def __str__(self):
         return self.text
@@ -57,6 +89,37 @@ class Question(models.Model):
         return ""
 
 
+class QuizResultQuerySet(models.QuerySet):
+    def with_scores(self):
+        # Every figure is a correlated subquery so the row count never fans out
+        # and the whole page costs one query regardless of how many results it has.
+        def question_count(question_type):
+            questions = Question.objects.filter(
+                quiz_set=OuterRef('quiz'), question_type=question_type
+            ).order_by().values('quiz_set').annotate(c=Count('id')).values('c')
+            return Coalesce(Subquery(questions, output_field=IntegerField()), 0)
+
+        graded = UserAnswer.objects.filter(
+            quiz_result=OuterRef('pk'), question__question_type='TEXT', grade__isnull=False
+        ).order_by().values('quiz_result')
+
+        correct = UserAnswer.objects.filter(
+            quiz_result=OuterRef('pk'), question__question_type='MCQ', selected_choice__is_correct=True
+        ).order_by().values('quiz_result').annotate(c=Count('id')).values('c')
+
+        return self.annotate(
+            mcq_correct=Coalesce(Subquery(correct, output_field=IntegerField()), 0),
+            mcq_total=question_count('MCQ'),
+            written_total=question_count('TEXT'),
+            graded_sum=Coalesce(
+                Subquery(graded.annotate(s=Sum('grade')).values('s'), output_field=FloatField()), 0.0
+            ),
+            graded_count=Coalesce(
+                Subquery(graded.annotate(c=Count('id')).values('c'), output_field=IntegerField()), 0
+            ),
+        )
+
+
 class QuizResult(models.Model):
     STATUS_CHOICES = [
         ('Pending', 'Pending'),
@@ -64,17 +127,33 @@ class QuizResult(models.Model):
         ('Fail', 'Fail'),
     ]
 
-    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    # result_user_created_idx leads with user, so it serves the FK lookups too.
+    user = models.ForeignKey(User, on_delete=models.CASCADE, db_index=False)
     quiz = models.ForeignKey(QuizSet, on_delete=models.CASCADE)
     department = models.ForeignKey(Department, on_delete=models.SET_NULL, null=True)
     score = models.IntegerField(default=0)
     total_questions = models.IntegerField(default=0)
+    answered_count = models.IntegerField(default=0)
     time_taken = models.DurationField(null=True, blank=True)
     start_time = models.DateTimeField(null=True, blank=True)
     end_time = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(default=timezone.now)
     pdf_file = models.FileField(upload_to='pdfs/', null=True, blank=True)
+    pdf_digest = models.CharField(max_length=64, blank=True)
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='Pending')
+    # Comma-separated ids of the attempt's questions in the order it shows them,
+    # drawn when the attempt starts. Empty for attempts from before sampling,
+    # which see every question of the quiz in id order.
+    question_order = models.TextField(blank=True)
+
+    objects = QuizResultQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-created_at'], name='result_created_idx'),
+            models.Index(fields=['user', '-created_at'], name='result_user_created_idx'),
+            models.Index(fields=['quiz', 'end_time'], name='result_quiz_end_idx'),
+        ]
 
     def percentage(self):
         return (self.score / self.total_questions) * 100 if self.total_questions else 0
@@ -83,6 +162,27 @@ class QuizResult(models.Model):
         return f"{self.user.username} - {self.quiz.title} - {self.status}"
 
 
+class QuizResultSummary(models.Model):
+    quiz_result = models.OneToOneField(QuizResult, on_delete=models.CASCADE, primary_key=True, related_name='summary')
+    mcq_correct = models.IntegerField(default=0)
+    mcq_total = models.IntegerField(default=0)
+    written_graded_sum = models.FloatField(default=0)
+    written_graded_count = models.IntegerField(default=0)
+    written_total = models.IntegerField(default=0)
+    mcq_percent = models.FloatField(default=0)
+    written_percent = models.FloatField(null=True, blank=True)
+    is_fully_graded = models.BooleanField(default=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['updated_at'], name='summary_updated_idx'),
+        ]
+
+    def __str__(self):
+        return f"Summary for result {self.quiz_result_id}"
+
+
 class Choice(models.Model):
     question = models.ForeignKey(Question, related_name='choices', on_delete=models.CASCADE)
     text = models.CharField("Choice Text", max_length=255)
@@ -98,7 +198,120 @@ class UserAnswer(models.Model):
     selected_choice = models.ForeignKey(Choice, null=True, blank=True, on_delete=models.SET_NULL)
     written_answer = models.TextField(blank=True)
     grade = models.FloatField(null=True, blank=True)
+    suggested_grade = models.FloatField(null=True, blank=True)
     quiz_result = models.ForeignKey(QuizResult, on_delete=models.CASCADE)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['quiz_result', 'question'], name='answer_result_question_idx'),
+            # The per-question grading queue: ungraded answers first, then
+            # the rest, each walked by id.
+            models.Index(
+                fields=['question', 'id'], name='answer_question_ungraded_idx', condition=Q(grade__isnull=True)
+            ),
+            models.Index(fields=['question', 'id'], name='answer_question_id_idx'),
+        ]
+
     def __str__(self):
         return f"{self.user.username} - {self.question.text[:50]}"
+
+
+class BackgroundJob(models.Model):
+    KIND_CHOICES = [
+        ('render_pdf', 'Render result PDF'),
+        ('autograde', 'Suggest written grades'),
+        ('leaderboard', 'Update leaderboards'),
+    ]
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+
+    kind = models.CharField(max_length=30, choices=KIND_CHOICES)
+    quiz_result = models.ForeignKey(QuizResult, on_delete=models.CASCADE, related_name='jobs')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='queued')
+    attempts = models.IntegerField(default=0)
+    generation = models.IntegerField(default=0)
+    run_after = models.DateTimeField(default=timezone.now)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['kind', 'quiz_result'], name='unique_job_per_result'),
+        ]
+        indexes = [
+            models.Index(fields=['status', 'run_after'], name='job_status_run_after_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} for result {self.quiz_result_id} ({self.status})"
+
+
+class QuizStats(models.Model):
+    """Item analysis of a quiz over its finished attempts; rebuilt by analytics.refresh_item_stats."""
+    quiz = models.OneToOneField(QuizSet, on_delete=models.CASCADE, primary_key=True, related_name='stats')
+    attempts = models.IntegerField(default=0)
+    mean_score = models.FloatField(null=True, blank=True)
+    percent_correct = models.FloatField(null=True, blank=True)
+    average_grade = models.FloatField(null=True, blank=True)
+    refreshed_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"Stats for quiz {self.quiz_id}"
+
+
+class QuestionStats(models.Model):
+    question = models.OneToOneField(Question, on_delete=models.CASCADE, primary_key=True, related_name='stats')
+    responses = models.IntegerField(default=0)
+    percent_correct = models.FloatField(null=True, blank=True)
+    discrimination = models.FloatField(null=True, blank=True)
+    average_grade = models.FloatField(null=True, blank=True)
+    graded_count = models.IntegerField(default=0)
+    choice_counts = models.JSONField(default=dict, blank=True)  # {choice id: times picked}
+    refreshed_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"Stats for question {self.question_id}"
+
+
+class LeaderboardEntry(models.Model):
+    """One user's standing over their finished attempts; rebuilt by the leaderboard module."""
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    attempts = models.IntegerField(default=0)
+    best_score = models.FloatField(default=0)
+    average_score = models.FloatField(default=0)
+    passed = models.IntegerField(default=0)
+    pass_rate = models.FloatField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        abstract = True
+
+
+class QuizLeaderboardEntry(LeaderboardEntry):
+    quiz = models.ForeignKey(QuizSet, on_delete=models.CASCADE, related_name='leaderboard')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['quiz', 'user'], name='unique_quiz_leaderboard_user'),
+        ]
+        indexes = [
+            models.Index(fields=['quiz', '-best_score', '-average_score', 'user'], name='quiz_leaderboard_score_idx'),
+        ]
+
+
+class DepartmentLeaderboardEntry(LeaderboardEntry):
+    department = models.ForeignKey(Department, on_delete=models.CASCADE, related_name='leaderboard')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['department', 'user'], name='unique_department_leaderboard_user'),
+        ]
+        indexes = [
+            models.Index(fields=['department', '-best_score', '-average_score', 'user'], name='dept_leaderboard_score_idx'),
+        ]
@@ -0,0 +1,243 @@
+import random
+import time
+from dataclasses import dataclass, replace
+from functools import cached_property
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F, Prefetch, Value
+from django.db.models.functions import Greatest
+from django.http import Http404
+
+from . import images
+from .instrumentation import span
+from .models import Choice, QuizSet
+
+# Bump PAPER_FORMAT whenever the dataclasses below change shape, so pickles
+# written by an older deploy are never read back.
+PAPER_FORMAT = 4
+# The image catalog tag keeps a deploy with new image variants from reading
+# papers that still point at the old ones.
+PAPER_KEY = 'quiz_paper:{quiz_id}:v{version}:f' + str(PAPER_FORMAT) + ':i{images}'
+
+# Papers compiled or fetched by this process, keyed by quiz id. Entries are
+# only served while their version matches the quiz's paper_version.
+_local_papers = {}
+
+
+@dataclass(frozen=True)
+class CompiledChoice:
+    id: int
+    question_id: int
+    text: str
+    is_correct: bool
+
+    def as_instance(self):
+        # Lets UserAnswer.selected_choice be assigned without reloading the row.
+        return Choice(id=self.id, question_id=self.question_id, text=self.text, is_correct=self.is_correct)
+
+
+@dataclass(frozen=True)
+class CompiledQuestion:
+    id: int
+    number: int
+    text: str
+    question_type: str
+    image_name: str
+    image_url: str
+    image: dict  # images.picture() of the display variant, or None
+    choices: tuple
+
+    def choice(self, choice_id):
+        for choice in self.choices:
+            if str(choice.id) == str(choice_id):
+                return choice
+        return None
+
+
+@dataclass(frozen=True)
+class CompiledPaper:
+    quiz_id: int
+    version: int
+    title: str
+    department_id: int
+    single_page: bool
+    sample_size: int  # 0 draws every question
+    shuffle_questions: bool
+    questions: tuple
+
+    @property
+    def id(self):
+        return self.quiz_id
+
+    @cached_property
+    def questions_by_id(self):
+        return {question.id: question for question in self.questions}
+
+    @property
+    def total_questions(self):
+        return len(self.questions)
+
+    @property
+    def mcq_total(self):
+        return sum(1 for q in self.questions if q.question_type == 'MCQ')
+
+    @property
+    def written_total(self):
+        return sum(1 for q in self.questions if q.question_type == 'TEXT')
+
+    def question(self, number):
+        """Return the 1-based ``number``-th question, or None when out of range."""
+        if 1 <= number <= len(self.questions):
+            return self.questions[number - 1]
+        return None
+
+    def draw_order(self):
+        """Question ids for a new attempt: ``sample_size`` of them at random, shuffled if the quiz says so."""
+        ids = [question.id for question in self.questions]
+        if 0 < self.sample_size < len(ids):
+            drawn = set(random.sample(ids, self.sample_size))
+            ids = [question_id for question_id in ids if question_id in drawn]
+        if self.shuffle_questions:
+            random.shuffle(ids)
+        return ids
+
+    def for_attempt(self, question_order):
+        """The paper as the attempt with this stored ``question_order`` sees it."""
+        if not question_order:
+            return self
+        return AttemptPaper(self, decode_order(question_order))
+
+
+class AttemptPaper:
+    """One attempt's questions, in its order, looked up by id on the shared paper.
+
+    Answers the same questions the views ask of a CompiledPaper. Questions
+    deleted since the attempt started drop out.
+    """
+
+    def __init__(self, paper, question_ids):
+        self.paper = paper
+        self.question_ids = [question_id for question_id in question_ids if question_id in paper.questions_by_id]
+
+    def __getattr__(self, name):
+        return getattr(self.paper, name)
+
+    @property
+    def total_questions(self):
+        return len(self.question_ids)
+
+    @property
+    def mcq_total(self):
+        return sum(1 for q in self.questions if q.question_type == 'MCQ')
+
+    @property
+    def written_total(self):
+        return sum(1 for q in self.questions if q.question_type == 'TEXT')
+
+    @cached_property
+    def questions(self):
+        return tuple(self.question(number) for number in range(1, len(self.question_ids) + 1))
+
+    def question(self, number):
+        if 1 <= number <= len(self.question_ids):
+            return replace(self.paper.questions_by_id[self.question_ids[number - 1]], number=number)
+        return None
+
+
+def encode_order(question_ids):
+    return ','.join(str(question_id) for question_id in question_ids)
+
+
+def decode_order(question_order):
+    return [int(question_id) for question_id in question_order.split(',') if question_id]
+
+
+def get_version(quiz_id):
+    """The quiz's paper version, read from the database.
+
+    Kept in the database rather than the cache so a bump made by one process
+    (an admin save, the job worker) is seen by every other process at its
+    next request, whatever cache backend is configured.
+    """
+    version = QuizSet.objects.filter(pk=quiz_id).values_list('paper_version', flat=True).first()
+    if version is None:
+        raise QuizSet.DoesNotExist(f"QuizSet {quiz_id} does not exist.")
+    return version
+
+
+def bump_version(quiz_id):
+    # At least the clock, so a save() that writes back a stale paper_version
+    # just before its bump can never land on a version already handed out.
+    QuizSet.objects.filter(pk=quiz_id).update(
+        paper_version=Greatest(F('paper_version') + 1, Value(int(time.time() * 1000)))
+    )
+    _local_papers.pop(quiz_id, None)
+
+
+def paper_questions(quiz):
+    """The quiz's questions in paper order, with their choices in order."""
+    return quiz.questions.order_by('id').prefetch_related(
+        Prefetch('choices', queryset=Choice.objects.order_by('id'))
+    )
+
+
+def compile_paper(quiz_id, version):
+    quiz = QuizSet.objects.get(pk=quiz_id)
+    questions = paper_questions(quiz)
+    return CompiledPaper(
+        quiz_id=quiz.id,
+        version=version,
+        title=quiz.title,
+        department_id=quiz.department_id,
+        single_page=quiz.single_page,
+        sample_size=quiz.sample_size or 0,
+        shuffle_questions=quiz.shuffle_questions,
+        questions=tuple(
+            CompiledQuestion(
+                id=question.id,
+                number=number,
+                text=question.text,
+                question_type=question.question_type,
+                image_name=question.image_name or '',
+                image_url=question.image_url(),
+                image=images.picture(question.image_name) if question.image_name else None,
+                choices=tuple(
+                    CompiledChoice(id=c.id, question_id=question.id, text=c.text, is_correct=c.is_correct)
+                    for c in question.choices.all()
+                ),
+            )
+            for number, question in enumerate(questions, start=1)
+        ),
+    )
+
+
+def get_paper(quiz_id, version=None):
+    """Return the compiled paper for ``quiz_id``.
+
+    Reads the current version (one indexed lookup) unless the caller already
+    fetched it with its own query, then checks this process, then the shared
+    cache, and only compiles from the database when neither holds that
+    version. Raises QuizSet.DoesNotExist for unknown quizzes.
+    """
+    if version is None:
+        version = get_version(quiz_id)
+    paper = _local_papers.get(quiz_id)
+    if paper is not None and paper.version == version:
+        return paper
+
+    key = PAPER_KEY.format(quiz_id=quiz_id, version=version, images=images.catalog_tag())
+    paper = cache.get(key)
+    if paper is None:
+        with span('paper'):
+            paper = compile_paper(quiz_id, version)
+        cache.set(key, paper, timeout=settings.QUIZ_PAPER_CACHE_TIMEOUT)
+    _local_papers[quiz_id] = paper
+    return paper
+
+
+def get_paper_or_404(quiz_id):
+    try:
+        return get_paper(quiz_id)
+    except QuizSet.DoesNotExist:
+        raise Http404("No QuizSet matches the given query.")
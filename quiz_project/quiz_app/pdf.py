@@ -0,0 +1,190 @@
+import hashlib
+import json
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.utils.timezone import localtime
+from pytz import timezone as pytz_timezone
+from reportlab.pdfgen import canvas
+
+from .instrumentation import span
+
+# Bump whenever render_pdf_bytes changes its layout so stored PDFs re-render.
+RENDER_VERSION = 1
+
+
+def result_pdf_context(result):
+    """Collect everything the PDF shows as plain strings.
+
+    Expects ``user``, ``quiz`` and ``summary`` to be loaded with the result.
+    The dict is picklable, so bulk exports can render it in another process.
+    """
+    tashkent_tz = pytz_timezone('Asia/Tashkent')
+
+    def local(value):
+        return localtime(value, tashkent_tz).strftime('%Y-%m-%d %H:%M:%S') if value else "-"
+
+    summary = result.summary
+    if not summary.written_total:
+        written_score = "N/A"
+    elif summary.written_percent is None:
+        written_score = "Not Graded"
+    else:
+        written_score = f"{summary.written_percent:.2f}%"
+
+    return {
+        'filename': f"result_{result.id}.pdf",
+        'username': result.user.username,
+        'quiz_title': result.quiz.title,
+        'mcq_score': f"{summary.mcq_percent:.2f}%",
+        'written_score': written_score,
+        'status': result.status,
+        'time_taken': str(result.time_taken),
+        'start_time': local(result.start_time),
+        'end_time': local(result.end_time),
+        'generated_on': local(result.created_at),
+    }
+
+
+def render_pdf_bytes(context):
+    buffer = BytesIO()
+    p = canvas.Canvas(buffer)
+
+    p.drawString(100, 800, f"User: {context['username']}")
+    p.drawString(100, 780, f"Test: {context['quiz_title']}")
+    p.drawString(100, 760, f"MCQ Score: {context['mcq_score']}")
+    p.drawString(100, 740, f"Written Score: {context['written_score']}")
+    p.drawString(100, 720, f"Status: {context['status']}")
+    p.drawString(100, 700, f"Time Taken: {context['time_taken']}")
+    p.drawString(100, 680, f"Start Time: {context['start_time']} (UZ)")
+    p.drawString(100, 660, f"End Time: {context['end_time']} (UZ)")
+    p.drawString(100, 640, f"Generated On: {context['generated_on']}")
+
+    p.showPage()
+    p.save()
+    return buffer.getvalue()
+
+
+def pdf_digest(context):
+    payload = json.dumps({'render_version': RENDER_VERSION, **context}, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def generate_result_pdf(result):
+    """Render the result's PDF unless one with identical inputs is already stored.
+
+    Files are named after the digest of their inputs, so an unchanged result
+    costs neither a render nor a write, and the superseded file is removed
+    once nothing references it. Returns False, and keeps no file, when the
+    result went back to Pending while it was rendering.
+    """
+    from .models import QuizResult
+
+    context = result_pdf_context(result)
+    digest = pdf_digest(context)
+    storage = result.pdf_file.storage
+    old_name = result.pdf_file.name if result.pdf_file else None
+
+    if result.pdf_digest == digest and old_name and storage.exists(old_name):
+        return False
+
+    name = f"pdfs/result_{result.id}_{digest[:16]}.pdf"
+    if not storage.exists(name):
+        with span('pdf'):
+            content = render_pdf_bytes(context)
+        name = storage.save(name, ContentFile(content))
+
+    # Only touch the PDF columns, and only while the result is still decided:
+    # staff may have set it back to Pending (clearing its PDF) mid-render.
+    if not QuizResult.objects.filter(pk=result.pk, status__in=['Pass', 'Fail']).update(
+        pdf_file=name, pdf_digest=digest,
+    ):
+        delete_unreferenced_pdf(name, storage)
+        return False
+    result.pdf_file.name = name
+    result.pdf_digest = digest
+
+    if old_name and old_name != name:
+        delete_unreferenced_pdf(old_name, storage)
+    return True
+
+
+def delete_unreferenced_pdf(name, storage=default_storage):
+    # Imported here so render-only pool processes never need the app registry.
+    from .models import QuizResult
+
+    if not QuizResult.objects.filter(pdf_file=name).exists() and storage.exists(name):
+        storage.delete(name)
+
+
+def stored_pdf(result, context):
+    """The result's stored PDF if it was rendered from ``context``, else None."""
+    pdf_file = result.pdf_file
+    if pdf_file and result.pdf_digest == pdf_digest(context) and pdf_file.storage.exists(pdf_file.name):
+        return pdf_file
+    return None
+
+
+def _read_chunks(pdf_file):
+    with pdf_file.open('rb'):
+        yield from pdf_file.chunks()
+
+
+def _render_named(context):
+    return context['filename'], render_pdf_bytes(context)
+
+
+def iter_result_pdfs(results, workers=1, stats=None):
+    """Yield ``(filename, content)`` for each result's PDF, in order.
+
+    A result whose stored PDF matches its current digest is streamed from
+    storage as a chunk iterator; only the others are rendered. With more than
+    one worker the renders run on a process pool, keeping at most a few
+    members per worker in flight so memory stays bounded however many results
+    are exported. Results need ``user``, ``quiz`` and ``summary`` loaded.
+    ``stats`` (a dict) receives the count, how many were rendered, elapsed
+    seconds and PDFs per second once the iterator is exhausted.
+    """
+    started = time.monotonic()
+    count = rendered = 0
+
+    def members(submit):
+        nonlocal rendered
+        for result in results:
+            context = result_pdf_context(result)
+            pdf_file = stored_pdf(result, context)
+            if pdf_file:
+                yield context['filename'], _read_chunks(pdf_file)
+            else:
+                rendered += 1
+                yield submit(context)
+
+    if workers <= 1:
+        for member in members(_render_named):
+            yield member
+            count += 1
+    else:
+        window = workers * 4
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            pending = deque()
+
+            def pop():
+                member = pending.popleft()
+                return member if isinstance(member, tuple) else member.result()
+
+            for member in members(lambda context: pool.submit(_render_named, context)):
+                pending.append(member)
+                if len(pending) >= window:
+                    yield pop()
+                    count += 1
+            while pending:
+                yield pop()
+                count += 1
+
+    if stats is not None:
+        elapsed = time.monotonic() - started
+        stats.update(count=count, rendered=rendered, elapsed=elapsed, rate=count / elapsed if elapsed else 0.0)
@@ -0,0 +1,179 @@
+import threading
+
+from django.db import transaction
+from django.db.models import Case, ExpressionWrapper, F, FloatField, QuerySet, When
+from django.utils import timezone
+
+from .models import QuizResult, QuizResultSummary
+from .papers import get_paper
+
+SUMMARY_FIELDS = [
+    'mcq_correct', 'mcq_total',
+    'written_graded_sum', 'written_graded_count', 'written_total',
+    'mcq_percent', 'written_percent', 'is_fully_graded', 'updated_at',
+]
+
+BATCH_SIZE = 1000
+
+
+def build_summary(result):
+    """Turn a QuizResult annotated by ``with_scores()`` into an unsaved summary."""
+    mcq_percent = (result.mcq_correct / result.mcq_total) * 100 if result.mcq_total else 0
+
+    written_total = result.written_total
+    is_fully_graded = result.graded_count >= written_total
+    written_percent = (
+        (result.graded_sum / (written_total * 100)) * 100
+        if written_total and is_fully_graded else None
+    )
+
+    return QuizResultSummary(
+        quiz_result_id=result.pk,
+        mcq_correct=result.mcq_correct,
+        mcq_total=result.mcq_total,
+        written_graded_sum=result.graded_sum,
+        written_graded_count=result.graded_count,
+        written_total=written_total,
+        mcq_percent=mcq_percent,
+        written_percent=written_percent,
+        is_fully_graded=is_fully_graded,
+    )
+
+
+def summary_rows(results):
+    """``results`` annotated with everything build_summary() needs."""
+    # The paper version rides along on each row, so sampled attempts cost no
+    # extra query per quiz once its paper is in this process.
+    return results.with_scores().annotate(paper_version=F('quiz__paper_version')).order_by()
+
+
+def refresh_summaries(results):
+    """Recompute the summaries of the given results (a QuizResult queryset or ids).
+
+    The figures come from one aggregate query per batch and are written back
+    with a single upsert, so this is cheap for one attempt and still set-based
+    for a whole quiz.
+    """
+    if not isinstance(results, QuerySet):
+        results = QuizResult.objects.filter(pk__in=list(results))
+
+    batch = []
+    refreshed = 0
+    for result in summary_rows(results).iterator(chunk_size=BATCH_SIZE):
+        if result.question_order:
+            # with_scores() counts every question of the quiz; an attempt
+            # that drew its own questions is out of those alone.
+            paper = get_paper(result.quiz_id, version=result.paper_version)
+            attempt = paper.for_attempt(result.question_order)
+            result.mcq_total, result.written_total = attempt.mcq_total, attempt.written_total
+        batch.append(build_summary(result))
+        if len(batch) >= BATCH_SIZE:
+            refreshed += _upsert(batch)
+            batch = []
+    if batch:
+        refreshed += _upsert(batch)
+    return refreshed
+
+
+def _upsert(summaries):
+    QuizResultSummary.objects.bulk_create(
+        summaries,
+        update_conflicts=True,
+        unique_fields=['quiz_result'],
+        update_fields=SUMMARY_FIELDS,
+    )
+    return len(summaries)
+
+
+def create_summary(result):
+    """Create the empty summary of a new attempt from its quiz's compiled paper."""
+    paper = get_paper(result.quiz_id).for_attempt(result.question_order)
+    return QuizResultSummary.objects.create(
+        quiz_result=result,
+        mcq_total=paper.mcq_total,
+        written_total=paper.written_total,
+        is_fully_graded=paper.written_total == 0,
+    )
+
+
+def record_answer(answer):
+    """Apply a freshly created answer to its attempt's summary.
+
+    A correct MCQ answer bumps the counters with one UPDATE and new written
+    answers are ungraded, so neither needs a recompute. Anything else falls
+    back to refreshing that one attempt.
+    """
+    if answer.grade is None:
+        if not answer.selected_choice_id or not answer.selected_choice.is_correct:
+            return
+        updated = QuizResultSummary.objects.filter(pk=answer.quiz_result_id).update(
+            mcq_correct=F('mcq_correct') + 1,
+            mcq_percent=Case(
+                When(mcq_total=0, then=0.0),
+                default=ExpressionWrapper(
+                    (F('mcq_correct') + 1) * 100.0 / F('mcq_total'), output_field=FloatField()
+                ),
+            ),
+            updated_at=timezone.now(),
+        )
+        if updated:
+            return
+
+    refresh_summaries([answer.quiz_result_id])
+
+
+def refresh_quiz_summaries(quiz_id):
+    return refresh_summaries(QuizResult.objects.filter(quiz_id=quiz_id))
+
+
+# Refreshes waiting for the current transaction to commit, per thread (each
+# thread has its own connections) and database alias.
+_pending = threading.local()
+
+
+def _pending_ids(kind):
+    by_alias = _pending.__dict__.setdefault(kind, {})
+    return by_alias.setdefault(transaction.get_connection().alias, set())
+
+
+def schedule_quiz_refresh(quiz_id):
+    """Refresh the summaries of every attempt at the quiz once the transaction commits.
+
+    An admin save of a question with its inline choices sends a signal per
+    row; the first callback to run takes the quiz off the pending set, so
+    the quiz is recomputed once. Every call queues its own callback, so a
+    refresh still runs when the first one was rolled back with a savepoint.
+    Outside a transaction the refresh runs right away.
+    """
+    pending = _pending_ids('quizzes')
+    pending.add(quiz_id)
+
+    def refresh():
+        if quiz_id in pending:
+            pending.discard(quiz_id)
+            refresh_quiz_summaries(quiz_id)
+
+    transaction.on_commit(refresh)
+
+
+def schedule_result_refresh(result_id):
+    """Refresh an attempt's summary once the transaction commits.
+
+    Deleting an attempt cascades to its answers before the attempt itself is
+    gone, so refreshing from the answers' delete signal right away would
+    re-create the summary the cascade just removed. Waiting for the commit
+    also folds a bulk delete of answers into one refresh per transaction: the
+    first callback to run refreshes every pending attempt.
+    """
+    pending = _pending_ids('results')
+    pending.add(result_id)
+
+    def refresh():
+        if pending:
+            result_ids = set(pending)
+            pending.clear()
+            # refresh_summaries() filters on the ids, so attempts deleted
+            # since (the cascade that removed their answers) are skipped.
+            refresh_summaries(result_ids)
+
+    transaction.on_commit(refresh)
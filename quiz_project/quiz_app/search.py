@@ -0,0 +1,194 @@
+"""Full-text search over question wording, choice wording and written answers.
+
+SQLite keeps an external-content FTS5 table per searched table, filled and
+kept in step by triggers, so every insert, update and delete (including
+bulk_create and queryset.update) reaches the index. Postgres needs no extra
+tables: a GIN index over ``to_tsvector`` of the column is maintained by the
+database itself. Both are created by migration 0028.
+
+On SQLite, a migration that rebuilds one of the searched tables drops its
+triggers; restore_missing_triggers() puts them back after every migrate.
+"""
+import re
+
+from django.db import connection, connections
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from .models import Choice, Question, UserAnswer
+
+# kind: (model, searched column)
+TARGETS = {
+    'questions': (Question, 'text'),
+    'choices': (Choice, 'text'),
+    'answers': (UserAnswer, 'written_answer'),
+}
+
+# The question bank mixes English, Russian and Uzbek, so no language's
+# stemmer fits; words are only lower-cased (and accents folded on SQLite).
+PG_CONFIG = 'simple'
+
+# Private-use characters mark highlighted words in snippets; the snippet is
+# escaped as a whole first, so answer text can never inject markup.
+_START, _STOP = '\ue000', '\ue001'
+SNIPPET_WORDS = 16
+
+_WORD = re.compile(r'\w+')
+
+
+def _fts_table(model):
+    return f'{model._meta.db_table}_fts'
+
+
+def _pg_vector(column):
+    return f"to_tsvector('{PG_CONFIG}', coalesce({column}, ''))"
+
+
+def install_statements(vendor):
+    """SQL creating the search indexes (and on SQLite the triggers) if they do not exist yet."""
+    for model, column in TARGETS.values():
+        table = model._meta.db_table
+        if vendor == 'sqlite':
+            fts = _fts_table(model)
+            yield (
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+                f"{column}, content='{table}', content_rowid='id', tokenize='unicode61 remove_diacritics 2')"
+            )
+            yield (
+                f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN "
+                f"INSERT INTO {fts}(rowid, {column}) VALUES (new.id, new.{column}); END"
+            )
+            yield (
+                f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN "
+                f"INSERT INTO {fts}({fts}, rowid, {column}) VALUES ('delete', old.id, old.{column}); END"
+            )
+            yield (
+                f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {column} ON {table} BEGIN "
+                f"INSERT INTO {fts}({fts}, rowid, {column}) VALUES ('delete', old.id, old.{column}); "
+                f"INSERT INTO {fts}(rowid, {column}) VALUES (new.id, new.{column}); END"
+            )
+            yield f"INSERT INTO {fts}({fts}) VALUES ('rebuild')"
+        elif vendor == 'postgresql':
+            yield f"CREATE INDEX IF NOT EXISTS {table}_fts ON {table} USING GIN ({_pg_vector(column)})"
+
+
+def parse_query(text):
+    """The words of ``text``, or an empty list if there is nothing to search for.
+
+    Only word characters survive, so neither FTS5 nor tsquery syntax can be
+    injected through the search box.
+    """
+    return _WORD.findall(text.lower())
+
+
+def _fts5_query(words, phrase):
+    if phrase:
+        return '"{}"'.format(' '.join(words))
+    # Every word must appear; the last one may still be half typed.
+    return ' '.join(f'"{word}"' for word in words[:-1]) + f' "{words[-1]}"*'
+
+
+def _tsquery(words, phrase):
+    joiner = ' <-> ' if phrase else ' & '
+    return joiner.join(words[:-1] + [f'{words[-1]}:*' if not phrase else words[-1]])
+
+
+def _hits(kind, words, phrase, limit):
+    """(id, rank, snippet) of the best matches, best first."""
+    model, column = TARGETS[kind]
+    table = model._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            fts = _fts_table(model)
+            cursor.execute(
+                f"SELECT rowid, bm25({fts}), snippet({fts}, 0, %s, %s, '…', %s) "
+                f"FROM {fts} WHERE {fts} MATCH %s ORDER BY bm25({fts}) LIMIT %s",
+                [_START, _STOP, SNIPPET_WORDS, _fts5_query(words, phrase), limit],
+            )
+            # bm25() is lower for better matches; flip it so higher is better everywhere.
+            return [(row_id, -rank, snippet) for row_id, rank, snippet in cursor.fetchall()]
+        if connection.vendor == 'postgresql':
+            options = f'StartSel={_START}, StopSel={_STOP}, MaxWords={SNIPPET_WORDS}, MinWords=5'
+            cursor.execute(
+                f"WITH query AS (SELECT to_tsquery('{PG_CONFIG}', %s) AS q), "
+                f"hits AS (SELECT id, {column} AS body, ts_rank({_pg_vector(column)}, query.q) AS rank "
+                f"FROM {table}, query WHERE {_pg_vector(column)} @@ query.q ORDER BY rank DESC LIMIT %s) "
+                f"SELECT id, rank, ts_headline('{PG_CONFIG}', body, query.q, %s) FROM hits, query ORDER BY rank DESC",
+                [_tsquery(words, phrase), limit, options],
+            )
+            return cursor.fetchall()
+    # Other backends get an unranked substring match.
+    ids = model.objects.filter(**{f'{column}__icontains': ' '.join(words)}).values_list('id', column)[:limit]
+    return [(row_id, 0.0, body[:200]) for row_id, body in ids]
+
+
+def highlight(snippet):
+    """Escape a snippet and turn the match markers into <mark> tags."""
+    return mark_safe(escape(snippet).replace(_START, '<mark>').replace(_STOP, '</mark>'))
+
+
+def search(kind, text, phrase=False, limit=20):
+    """Ranked matches for ``text`` among questions, choices or answers.
+
+    Returns dicts with the matching ``object`` (with the rows its listing
+    needs already joined), its ``rank`` and a highlighted ``snippet``.
+    """
+    words = parse_query(text)
+    if not words:
+        return []
+    hits = _hits(kind, words, phrase, limit)
+    model = TARGETS[kind][0]
+    related = {
+        'questions': ['quiz_set__department'],
+        'choices': ['question__quiz_set'],
+        'answers': ['user', 'question'],
+    }[kind]
+    objects = model.objects.select_related(*related).in_bulk([row_id for row_id, _, _ in hits])
+    return [
+        {'object': objects[row_id], 'rank': rank, 'snippet': highlight(snippet)}
+        for row_id, rank, snippet in hits if row_id in objects
+    ]
+
+
+def matching_ids(kind, text, limit=200):
+    """Ids of the best matches for ``text``, for filtering related tables by them."""
+    words = parse_query(text)
+    if not words:
+        return []
+    return [row_id for row_id, _, _ in _hits(kind, words, False, limit)]
+
+
+def rebuild_index(using='default'):
+    """Re-create missing triggers and re-index every row (SQLite); a no-op elsewhere."""
+    db = connections[using]
+    with db.cursor() as cursor:
+        for sql in install_statements(db.vendor):
+            cursor.execute(sql)
+
+
+def missing_triggers(using='default'):
+    """Names of SQLite index triggers that are gone while their FTS table is still there."""
+    db = connections[using]
+    if db.vendor != 'sqlite':
+        return []
+    with db.cursor() as cursor:
+        cursor.execute("SELECT name FROM sqlite_master WHERE type IN ('table', 'trigger')")
+        present = {name for name, in cursor.fetchall()}
+    return [
+        f'{fts}_{suffix}'
+        for fts in (_fts_table(model) for model, _ in TARGETS.values()) if fts in present
+        for suffix in ('ai', 'ad', 'au') if f'{fts}_{suffix}' not in present
+    ]
+
+
+def restore_missing_triggers(using='default'):
+    """Rebuild the index if a migration dropped any of its triggers; returns the names that were missing.
+
+    SQLite's table rebuild (behind most AlterField operations) drops the
+    table's triggers without a word, and rows written since then are missing
+    from the index, so the whole index is rebuilt, not just the triggers.
+    """
+    missing = missing_triggers(using)
+    if missing:
+        rebuild_index(using)
+    return missing
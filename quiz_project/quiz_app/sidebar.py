@@ -0,0 +1,55 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F, Subquery, Value
+from django.db.models.functions import Greatest
+from django.utils.translation import get_language
+
+from .models import CacheVersion, Department
+
+VERSION_NAME = 'sidebar'
+DEPARTMENTS_KEY = 'sidebar:departments:{language}:v{version}'
+
+
+def version_subquery():
+    """The sidebar version as a subquery, to ride along on a query the request makes anyway.
+
+    auth.SidebarVersionBackend annotates it onto the logged-in user.
+    """
+    return Subquery(CacheVersion.objects.filter(name=VERSION_NAME).values('version')[:1])
+
+
+def get_version():
+    """The sidebar's version, read from the database.
+
+    Kept in the database like QuizSet.paper_version, so a bump made by any
+    process is seen by every other one at its next request, whatever cache
+    backend is configured. Pages with a logged-in user get it with the user
+    instead and never call this.
+    """
+    return CacheVersion.objects.filter(name=VERSION_NAME).values_list('version', flat=True).first() or 0
+
+
+def bump_version():
+    # Seeded from the clock so a reset counter never rewinds onto a version
+    # whose list or fragment is still in a shared cache.
+    version = Greatest(F('version') + 1, Value(int(time.time() * 1000)))
+    if not CacheVersion.objects.filter(name=VERSION_NAME).update(version=version):
+        CacheVersion.objects.get_or_create(name=VERSION_NAME, defaults={'version': int(time.time() * 1000)})
+
+
+def get_departments(version=None):
+    """Departments for the sidebar as ``{'id', 'translated_name'}`` dicts, cached per language.
+
+    Pass ``version`` when the caller has already read it, to save the lookup.
+    """
+    key = DEPARTMENTS_KEY.format(language=get_language(), version=get_version() if version is None else version)
+    departments = cache.get(key)
+    if departments is None:
+        departments = [
+            {'id': department.id, 'translated_name': str(department.translated_name)}
+            for department in Department.objects.order_by('id')
+        ]
+        cache.set(key, departments, timeout=settings.SIDEBAR_CACHE_TIMEOUT)
+    return departments
@@ -0,0 +1,73 @@
+import logging
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Choice, Department, Question, QuizResult, QuizSet, UserAnswer
+from . import leaderboard, papers, scoring, search, sidebar
+
+logger = logging.getLogger(__name__)
+
+
+@receiver(post_save, sender=QuizResult)
+def create_result_summary(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        scoring.create_summary(instance)
+
+
+@receiver(post_delete, sender=QuizResult)
+def update_leaderboards_on_result_delete(sender, instance, **kwargs):
+    leaderboard.schedule_update(instance.user_id, instance.quiz_id, instance.department_id)
+
+
+@receiver(post_save, sender=UserAnswer)
+def update_summary_on_answer_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        scoring.record_answer(instance)
+    else:
+        scoring.refresh_summaries([instance.quiz_result_id])
+
+
+@receiver(post_delete, sender=UserAnswer)
+def update_summary_on_answer_delete(sender, instance, **kwargs):
+    scoring.schedule_result_refresh(instance.quiz_result_id)
+
+
+@receiver(post_save, sender=QuizSet)
+@receiver(post_delete, sender=QuizSet)
+def invalidate_paper_on_quiz_change(sender, instance, **kwargs):
+    papers.bump_version(instance.pk)
+
+
+@receiver(post_save, sender=Question)
+@receiver(post_delete, sender=Question)
+def update_on_question_change(sender, instance, raw=False, **kwargs):
+    papers.bump_version(instance.quiz_set_id)
+    if not raw:
+        scoring.schedule_quiz_refresh(instance.quiz_set_id)
+
+
+@receiver(post_save, sender=Choice)
+@receiver(post_delete, sender=Choice)
+def update_on_choice_change(sender, instance, raw=False, **kwargs):
+    quiz_id = Question.objects.filter(pk=instance.question_id).values_list('quiz_set_id', flat=True).first()
+    if quiz_id is None:
+        return
+    papers.bump_version(quiz_id)
+    if not raw:
+        scoring.schedule_quiz_refresh(quiz_id)
+
+
+@receiver(post_save, sender=Department)
+@receiver(post_delete, sender=Department)
+def invalidate_sidebar_on_department_change(sender, **kwargs):
+    sidebar.bump_version()
+
+
+# Connected to post_migrate in apps.py.
+def restore_search_triggers(sender, using='default', **kwargs):
+    restored = search.restore_missing_triggers(using)
+    if restored:
+        logger.warning("Re-created search triggers dropped by a migration: %s", ', '.join(restored))
@@ -1,7 +1,11 @@
+from django.conf import settings
 from django.urls import path
-from . import views
+from . import async_views, views
 from django.contrib.auth.views import LoginView, LogoutView
 
+# The candidate hot path has async twins for ASGI deployments.
+quiz_views = async_views if settings.ASYNC_QUIZ_VIEWS else views
+
 urlpatterns = [
     path('', views.dashboard_view, name='dashboard'),
     path('login/', LoginView.as_view(template_name='login.html'), name='login'),
@@ -9,9 +13,10 @@ urlpatterns = [
     path('signup/', views.signup_view, name='signup'),
 
     path('quiz/<int:quiz_id>/', views.start_quiz, name='start_quiz'),
-    path('quiz/<int:quiz_id>/question/<int:question_number>/', views.quiz_question, name='quiz_question'),
-    path('quiz/<int:quiz_id>/result/', views.quiz_result, name='quiz_result'),
-    path('department/<int:department_id>/quizzes/', views.department_quizzes, name='department_quizzes'),
+    path('quiz/<int:quiz_id>/question/<int:question_number>/', quiz_views.quiz_question, name='quiz_question'),
+    path('quiz/<int:quiz_id>/paper/', views.quiz_paper, name='quiz_paper'),
+    path('quiz/<int:quiz_id>/result/', quiz_views.quiz_result, name='quiz_result'),
+    path('department/<int:department_id>/quizzes/', quiz_views.department_quizzes, name='department_quizzes'),
     path('dashboard/', views.dashboard_view, name='dashboard'),
 
     path('result/<int:result_id>/download/', views.download_result_pdf, name='download_result_pdf'),
@@ -20,4 +25,15 @@ urlpatterns = [
     path('change-status/<int:result_id>/', views.change_status, name='change_status'),
     path('platform-info/', views.platform_info_view, name='platform_info'),
     path('grade/<int:result_id>/', views.grade_written_view, name='grade_written'),
+    path('grade/questions/', views.grading_questions, name='grading_questions'),
+    path('grade/question/<int:question_id>/', views.grade_question_view, name='grade_question'),
+    path('export/results/', views.export_results, name='export_results'),
+    path('analytics/items/', views.item_analysis, name='item_analysis'),
+    path('analytics/items/<int:quiz_id>/', views.quiz_item_analysis, name='quiz_item_analysis'),
+    path('search/', views.search_view, name='search'),
+    path('leaderboard/quiz/<int:scope_id>/', views.leaderboard_view, {'scope': 'quiz'}, name='quiz_leaderboard'),
+    path(
+        'leaderboard/department/<int:scope_id>/', views.leaderboard_view, {'scope': 'department'},
+        name='department_leaderboard',
+    ),
 ]
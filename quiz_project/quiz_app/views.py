@@ -3,18 +3,33 @@ from django.contrib.auth.decorators import login_required
 from django.contrib.auth.forms import UserCreationForm
 from django.contrib.auth import login
 from django.utils import timezone
-from django.core.files import File
-from django.http import FileResponse, Http404, HttpResponseForbidden, HttpResponseRedirect
+from django.http import (
+    FileResponse, Http404, HttpResponse, HttpResponseForbidden, HttpResponseRedirect, JsonResponse,
+)
 from django.urls import reverse
 from django.utils.translation import gettext_lazy as _
+from django.utils.dateparse import parse_date
 from django.utils.timezone import localtime, make_aware
-from pytz import timezone as pytz_timezone
-from io import BytesIO
-from reportlab.pdfgen import canvas
 from datetime import timedelta
 
 from django.contrib import messages
-from .models import QuizSet, Question, Choice, QuizResult, Department, UserAnswer
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db import DatabaseError, connection, transaction
+from django.db.models import Count, F, OuterRef, Q, Subquery
+from .models import (
+    BackgroundJob, QuizSet, Question, Choice, QuizResult, Department, UserAnswer,
+    DepartmentLeaderboardEntry, QuizLeaderboardEntry,
+)
+from .analytics import refresh_quiz
+from .exports import EXPORT_FORMATS, download_response, filter_results, tabular_rows
+from .jobs import AUTOGRADE, RENDER_PDF, UPDATE_LEADERBOARD, cancel_job, enqueue_job
+from .leaderboard import RANK_ORDER, rank_page
+from .papers import encode_order, get_paper_or_404
+from .scoring import refresh_summaries
+from .search import TARGETS as SEARCH_TARGETS, search
+from .warmup import is_warm, warm_up
+from django.views.decorators.cache import never_cache
 from django.views.decorators.http import require_POST
 
 # ----------------- Signup -----------------
@@ -33,130 +48,227 @@ def signup_view(request):
 # ----------------- Quiz Flow -----------------
 @login_required
 def start_quiz(request, quiz_id):
-    quiz = get_object_or_404(QuizSet, id=quiz_id)
+    paper = get_paper_or_404(quiz_id)
     start_time = timezone.now()
 
     result = QuizResult.objects.create(
         user=request.user,
-        quiz=quiz,
-        department=quiz.department,
+        quiz_id=paper.quiz_id,
+        department_id=paper.department_id,
         start_time=start_time,
-        status='Pending'
+        status='Pending',
+        # Frozen for the attempt: each page looks its question up by id.
+        question_order=encode_order(paper.draw_order()),
     )
 
+    # The only session write of an attempt; progress and score live on the
+    # QuizResult row from here on.
     request.session[f'quiz_{quiz_id}_result_id'] = result.id
-    request.session[f'quiz_{quiz_id}_score'] = 0
-    request.session[f'quiz_{quiz_id}_start_time'] = start_time.isoformat()
 
-    return redirect('quiz_question', quiz_id=quiz.id, question_number=1)
+    if paper.single_page:
+        return redirect('quiz_paper', quiz_id=paper.quiz_id)
+    return redirect('quiz_question', quiz_id=paper.quiz_id, question_number=1)
+
+
+def attempt_progress(attempt):
+    """``(answered_count, question_order)`` of the attempt; 404 when there is none."""
+    progress = attempt.values_list('answered_count', 'question_order').first()
+    if progress is None:
+        raise Http404("No quiz attempt in progress.")
+    return progress
+
+
+def resume_attempt(quiz, answered_count):
+    if answered_count >= quiz.total_questions:
+        return redirect('quiz_result', quiz_id=quiz.id)
+    return redirect('quiz_question', quiz_id=quiz.id, question_number=answered_count + 1)
+
+
+def question_context(quiz, question, question_number, error_message=None):
+    context = {
+        'quiz': quiz, 'question': question, 'question_number': question_number, 'total_questions': quiz.total_questions
+    }
+    if error_message:
+        context['error_message'] = error_message
+    return context
+
+
+def parse_answer(data, question, user, result_id):
+    """Build the UserAnswer posted for ``question``; returns ``(answer, correct, error_message)``."""
+    answer = UserAnswer(user=user, question_id=question.id, quiz_result_id=result_id)
+    correct = False
+
+    if question.question_type == 'MCQ':
+        selected_choice_id = data.get('choice')
+        if not selected_choice_id:
+            return answer, False, _("Please select an answer.")
+        selected_choice = question.choice(selected_choice_id)
+        answer.selected_choice = selected_choice.as_instance() if selected_choice else None
+        correct = bool(selected_choice and selected_choice.is_correct)
+
+    elif question.question_type == 'TEXT':
+        answer.written_answer = data.get('written_answer', '').strip()
+        if not answer.written_answer:
+            return answer, False, _("Please write your answer.")
+
+    return answer, correct, None
+
+
+def advance_attempt(attempt, question_number, answer, correct):
+    """Save ``answer`` and move the attempt past ``question_number``; False if it had moved on already."""
+    with transaction.atomic():
+        # Advancing is one conditional UPDATE on the attempt, so a replayed
+        # POST or a second tab cannot record the same question twice.
+        advanced = attempt.filter(answered_count=question_number - 1).update(
+            answered_count=F('answered_count') + 1,
+            score=F('score') + int(correct),
+        )
+        if advanced:
+            answer.save()
+    return bool(advanced)
+
+
+def next_page(quiz, question_number):
+    if question_number == quiz.total_questions:
+        return redirect('quiz_result', quiz_id=quiz.id)
+    return redirect('quiz_question', quiz_id=quiz.id, question_number=question_number + 1)
 
 
 @login_required
 def quiz_question(request, quiz_id, question_number):
-    quiz = get_object_or_404(QuizSet, id=quiz_id)
-    questions = quiz.questions.all().order_by('id')
+    paper = get_paper_or_404(quiz_id)
+    result_id = request.session.get(f'quiz_{quiz_id}_result_id')
+    attempt = QuizResult.objects.filter(id=result_id, user=request.user)
+    answered_count, question_order = attempt_progress(attempt)
 
-    if question_number < 1 or question_number > questions.count():
+    quiz = paper.for_attempt(question_order)
+    question = quiz.question(question_number)
+
+    if question is None:
         return redirect('dashboard')
 
-    question = questions[question_number - 1]
+    if answered_count != question_number - 1:
+        return resume_attempt(quiz, answered_count)
+
+    if request.method == 'POST':
+        answer, correct, error_message = parse_answer(request.POST, question, request.user, result_id)
+        if error_message:
+            return render(request, 'quiz_question.html', question_context(quiz, question, question_number, error_message))
+        if not advance_attempt(attempt, question_number, answer, correct):
+            return resume_attempt(quiz, attempt_progress(attempt)[0])
+        return next_page(quiz, question_number)
+
+    return render(request, 'quiz_question.html', question_context(quiz, question, question_number))
+
+
+@login_required
+def quiz_paper(request, quiz_id):
+    paper = get_paper_or_404(quiz_id)
     result_id = request.session.get(f'quiz_{quiz_id}_result_id')
-    result_instance = get_object_or_404(QuizResult, id=result_id)
+    result_instance = get_object_or_404(QuizResult, id=result_id, user=request.user)
+    quiz = paper.for_attempt(result_instance.question_order)
+
+    items = [{'question': question, 'value': '', 'error': None} for question in quiz.questions]
 
     if request.method == 'POST':
-        if question.question_type == 'MCQ':
-            selected_choice_id = request.POST.get('choice')
-            if selected_choice_id:
-                selected_choice = question.choices.filter(id=selected_choice_id).first()
-                UserAnswer.objects.create(
-                    user=request.user, question=question,
-                    selected_choice=selected_choice,
-                    quiz_result=result_instance
-                )
-                if selected_choice and selected_choice.is_correct:
-                    key = f'quiz_{quiz_id}_score'
-                    request.session[key] = request.session.get(key, 0) + 1
-            else:
-                return render(request, 'quiz_question.html', {
-                    'quiz': quiz, 'question': question, 'question_number': question_number,
-                    'total_questions': questions.count(), 'error_message': _("Please select an answer.")
-                })
-
-        elif question.question_type == 'TEXT':
-            written_answer = request.POST.get('written_answer', '').strip()
-            if written_answer:
-                UserAnswer.objects.create(
-                    user=request.user, question=question,
-                    written_answer=written_answer,
-                    quiz_result=result_instance
-                )
-            else:
-                return render(request, 'quiz_question.html', {
-                    'quiz': quiz, 'question': question, 'question_number': question_number,
-                    'total_questions': questions.count(), 'error_message': _("Please write your answer.")
-                })
-
-        if question_number == questions.count():
-            return redirect('quiz_result', quiz_id=quiz.id)
-        return redirect('quiz_question', quiz_id=quiz.id, question_number=question_number + 1)
-
-    return render(request, 'quiz_question.html', {
-        'quiz': quiz, 'question': question, 'question_number': question_number, 'total_questions': questions.count()
-    })
+        answers = []
+        score = 0
+        for item in items:
+            question = item['question']
+            if question.question_type == 'MCQ':
+                item['value'] = request.POST.get(f'choice_{question.id}', '')
+                selected_choice = question.choice(item['value']) if item['value'] else None
+                if selected_choice is None:
+                    item['error'] = _("Please select an answer.")
+                    continue
+                if selected_choice.is_correct:
+                    score += 1
+                answers.append(UserAnswer(
+                    user=request.user, question_id=question.id,
+                    selected_choice_id=selected_choice.id, quiz_result=result_instance
+                ))
+            elif question.question_type == 'TEXT':
+                item['value'] = request.POST.get(f'written_answer_{question.id}', '').strip()
+                if not item['value']:
+                    item['error'] = _("Please write your answer.")
+                    continue
+                answers.append(UserAnswer(
+                    user=request.user, question_id=question.id,
+                    written_answer=item['value'], quiz_result=result_instance
+                ))
+
+        if any(item['error'] for item in items):
+            return render(request, 'quiz_paper.html', {
+                'quiz': quiz, 'items': items, 'error_message': _("Please answer every question."),
+            })
+
+        with transaction.atomic():
+            # Only the first submission moves the attempt off zero answers.
+            submitted = QuizResult.objects.filter(id=result_instance.id, answered_count=0).update(
+                answered_count=len(answers), score=score,
+            )
+            if submitted:
+                UserAnswer.objects.bulk_create(answers)
+                # bulk_create skips post_save, so score the attempt once here
+                refresh_summaries([result_instance.id])
+
+        if not submitted:
+            messages.warning(request, _("This quiz has already been submitted; your first answers were kept."))
+        return redirect('quiz_result', quiz_id=quiz.id)
+
+    return render(request, 'quiz_paper.html', {'quiz': quiz, 'items': items})
+
+
+def finish_attempt(result, total_questions):
+    """Stamp the end of the attempt the first time its result page is shown; returns the fields to save."""
+    if result.end_time is not None:
+        return []
+    result.total_questions = total_questions
+    result.end_time = timezone.now()
+    result.time_taken = result.end_time - result.start_time
+    return ['total_questions', 'end_time', 'time_taken']
+
+
+def result_context(quiz, result):
+    summary = result.summary
+    return {
+        'quiz': quiz,
+        'score': result.score,
+        'total_questions': quiz.total_questions,
+        'status': result.status,
+        'result': result,
+        'mcq_percent': summary.mcq_percent,
+        'written_percent': summary.written_percent,
+        'written_exists': summary.written_total > 0,
+        'mcq_exists': summary.mcq_total > 0
+    }
+
 
 @login_required
 def quiz_result(request, quiz_id):
-    quiz = get_object_or_404(QuizSet, id=quiz_id)
-    score = request.session.pop(f'quiz_{quiz_id}_score', 0)
+    paper = get_paper_or_404(quiz_id)
     result_id = request.session.get(f'quiz_{quiz_id}_result_id')
 
-    total_questions = quiz.questions.count()
-
     if not result_id:
         messages.error(request, _("Session expired or invalid access. Please retake the quiz."))
         return redirect('dashboard')
 
-    result = get_object_or_404(QuizResult, id=result_id)
+    result = get_object_or_404(QuizResult.objects.select_related('summary'), id=result_id, user=request.user)
+    quiz = paper.for_attempt(result.question_order)
 
-    result.score = score
-    result.total_questions = total_questions
-    result.end_time = timezone.now()
-    result.time_taken = result.end_time - result.start_time
-    result.save()
+    update_fields = finish_attempt(result, quiz.total_questions)
+    if update_fields:
+        result.save(update_fields=update_fields)
+        enqueue_job(UPDATE_LEADERBOARD, result.id)
+        if quiz.written_total:
+            # Suggest written grades in the background so graders only confirm them
+            enqueue_job(AUTOGRADE, result.id)
 
     # Optional: Clean session after final load, if needed:
     if request.method == "POST" or request.GET.get("final", "") == "true":
         request.session.pop(f'quiz_{quiz_id}_result_id', None)
 
-    # MCQ and Written calculations...
-    mcq_total = result.quiz.questions.filter(question_type='MCQ').count()
-    mcq_percent = (result.score / mcq_total) * 100 if mcq_total else 0
-
-    written_total = result.quiz.questions.filter(question_type='TEXT').count()
-    written_answers = UserAnswer.objects.filter(
-        quiz_result=result,
-        question__question_type='TEXT'
-    )
-
-    graded_sum = sum(wa.grade for wa in written_answers if wa.grade is not None)
-    graded_count = written_answers.filter(grade__isnull=False).count()
-
-    written_percent = (
-        (graded_sum / (written_total * 100)) * 100
-        if written_total and graded_count == written_total else None
-    )
-
-    return render(request, 'quiz_result.html', {
-        'quiz': quiz,
-        'score': score,
-        'total_questions': total_questions,
-        'status': result.status,
-        'result': result,
-        'mcq_percent': mcq_percent,
-        'written_percent': written_percent,
-        'written_exists': written_total > 0,
-        'mcq_exists': mcq_total > 0
-    })
+    return render(request, 'quiz_result.html', result_context(quiz, result))
 
 
 # ----------------- Dashboard -----------------
@@ -164,35 +276,34 @@ from django.utils.timezone import localtime
 
 @login_required
 def dashboard_view(request):
-    results = QuizResult.objects.all().order_by('-created_at') if request.user.is_staff else QuizResult.objects.filter(user=request.user).order_by('-created_at')
+    results = dashboard_results(request.user)
 
     results_data = []
+    rendering = False
     for result in results:
-        mcq_total = result.quiz.questions.filter(question_type='MCQ').count()
-        mcq_percent = (result.score / mcq_total) * 100 if mcq_total else 0
-
-        written_total = result.quiz.questions.filter(question_type='TEXT').count()
-        
-        written_answers = UserAnswer.objects.filter(
-            quiz_result=result,
-            question__question_type='TEXT'
-        )
-
-        graded_sum = sum(wa.grade for wa in written_answers if wa.grade is not None)
-        graded_count = written_answers.filter(grade__isnull=False).count()
-
-        written_percent = (graded_sum / (written_total * 100)) * 100 if written_total and graded_count == written_total else None
-
+        summary = result.summary
+        rendering = rendering or result.pdf_job_status in ('queued', 'running')
         results_data.append({
             'result': result,
-            'mcq_percent': mcq_percent,
-            'written_percent': written_percent,
-            'written_exists': written_total > 0,
+            'mcq_percent': summary.mcq_percent,
+            'written_percent': summary.written_percent,
+            'written_exists': summary.written_total > 0,
             'local_created_at': localtime(result.created_at),
             'local_time_taken': result.time_taken,
         })
 
-    return render(request, 'dashboard.html', {'results_data': results_data})
+    return render(request, 'dashboard.html', {'results_data': results_data, 'rendering': rendering})
+
+
+def dashboard_results(user):
+    """Results on ``user``'s dashboard, newest first: every one for staff, else their own."""
+    pdf_jobs = BackgroundJob.objects.filter(quiz_result=OuterRef('pk'), kind=RENDER_PDF)
+    results = QuizResult.objects.select_related('user', 'quiz', 'department', 'summary').annotate(
+        pdf_job_status=Subquery(pdf_jobs.values('status')[:1])
+    ).order_by('-created_at')
+    if not user.is_staff:
+        results = results.filter(user=user)
+    return results
 
 
 # ----------------- Department -----------------
@@ -200,47 +311,11 @@ def dashboard_view(request):
 def department_quizzes(request, department_id):
     department = get_object_or_404(Department, id=department_id)
     quizzes = QuizSet.objects.filter(department=department)
-    departments = Department.objects.all()
     return render(request, 'department_quizzes.html', {
-        'department': department, 'quizzes': quizzes, 'departments': departments
+        'department': department, 'quizzes': quizzes
     })
 
 
-# ----------------- PDF Generation -----------------
-def generate_result_pdf(result):
-    buffer = BytesIO()
-    p = canvas.Canvas(buffer)
-
-    tashkent_tz = pytz_timezone('Asia/Tashkent')
-    start_local = localtime(result.start_time, tashkent_tz).strftime('%Y-%m-%d %H:%M:%S')
-    end_local = localtime(result.end_time, tashkent_tz).strftime('%Y-%m-%d %H:%M:%S')
-
-    mcq_total = result.quiz.questions.filter(question_type='MCQ').count()
-    mcq_percent = (result.score / mcq_total) * 100 if mcq_total else 0
-
-    written_total = result.quiz.questions.filter(question_type='TEXT').count()
-    written_answers = UserAnswer.objects.filter(user=result.user, question__quiz_set=result.quiz, question__question_type='TEXT')
-    graded_sum = sum(wa.grade for wa in written_answers if wa.grade is not None)
-    written_percent = (graded_sum / (written_total * 100)) * 100 if written_total else 0
-
-    p.drawString(100, 800, f"User: {result.user.username}")
-    p.drawString(100, 780, f"Test: {result.quiz.title}")
-    p.drawString(100, 760, f"MCQ Score: {mcq_percent:.2f}%")
-    p.drawString(100, 740, f"Written Score: {written_percent:.2f}%" if written_total else "Written Score: N/A")
-    p.drawString(100, 720, f"Status: {result.status}")
-    p.drawString(100, 700, f"Time Taken: {result.time_taken}")
-    p.drawString(100, 680, f"Start Time: {start_local} (UZ)")
-    p.drawString(100, 660, f"End Time: {end_local} (UZ)")
-    p.drawString(100, 640, f"Generated On: {localtime(result.created_at, tashkent_tz).strftime('%Y-%m-%d %H:%M:%S')}")
-
-    p.showPage()
-    p.save()
-    buffer.seek(0)
-
-    result.pdf_file.save(f"result_{result.id}.pdf", File(buffer))
-    result.save()
-
-
 # ----------------- PDF Views -----------------
 @require_POST
 @login_required
@@ -249,7 +324,7 @@ def generate_pdf(request, result_id):
         return HttpResponseForbidden("Only staff can generate PDFs.")
     result = get_object_or_404(QuizResult, id=result_id)
     if result.status != "Pending":
-        generate_result_pdf(result)
+        enqueue_job(RENDER_PDF, result.id)
     return redirect('dashboard')
 
 
@@ -270,21 +345,24 @@ def grade_written_view(request, result_id):
 
     result = get_object_or_404(QuizResult, id=result_id)
     
-    written_answers = UserAnswer.objects.filter(
-        quiz_result=result,
-        question__question_type='TEXT'
-    )
+    written_answers = list(result_written_answers(result))
 
     if request.method == 'POST':
+        graded = []
         for wa in written_answers:
             grade_value = request.POST.get(f'grade_{wa.id}')
             if grade_value is not None:
                 try:
                     wa.grade = min(max(float(grade_value), 0), 100)
-                    wa.save()
+                    graded.append(wa)
                 except ValueError:
                     pass  # ignore invalid input
 
+        # bulk_update skips post_save, so refresh the attempt's summary once here
+        UserAnswer.objects.bulk_update(graded, ['grade'])
+        refresh_summaries([result.id])
+        enqueue_job(UPDATE_LEADERBOARD, result.id)
+
         return redirect('dashboard')
 
     return render(request, 'grade_written.html', {
@@ -292,6 +370,210 @@ def grade_written_view(request, result_id):
         'written_answers': written_answers
     })
 
+
+def result_written_answers(result):
+    """The answers to ``result``'s written questions, with their questions."""
+    return UserAnswer.objects.filter(
+        quiz_result=result,
+        question__question_type='TEXT'
+    ).select_related('question')
+
+
+# Answers shown per page of the per-question grading queue.
+GRADING_PAGE_SIZE = 25
+
+
+def grading_queue(question, graded, after_id):
+    """``question``'s graded or ungraded answers after ``after_id``, in id order."""
+    return UserAnswer.objects.filter(
+        question=question, grade__isnull=not graded, id__gt=after_id,
+    ).select_related('user').order_by('id')
+
+
+def grading_page(question, cursor='', size=None):
+    """One page of ``question``'s grading queue and the cursor of the next page.
+
+    Ungraded answers come first, then graded ones, each in id order. The
+    cursor is the phase ("u" or "g") and the last id shown, so every page is
+    an index range scan however deep the grader goes, and grading a page
+    does not shift the pages after it.
+    """
+    phase, last_id = cursor[:1], cursor[1:]
+    if phase not in ('u', 'g') or not last_id.isdigit():
+        phase, last_id = 'u', '0'
+    size = size or GRADING_PAGE_SIZE
+
+    page = []
+    if phase == 'u':
+        page = list(grading_queue(question, False, last_id)[:size + 1])
+        phase, last_id = 'g', '0'
+    if len(page) <= size:
+        page += list(grading_queue(question, True, last_id)[:size + 1 - len(page)])
+
+    if len(page) <= size:
+        return page, None
+    last = page[size - 1]
+    return page[:size], f"{'u' if last.grade is None else 'g'}{last.id}"
+
+
+@login_required
+def grading_questions(request):
+    if not request.user.is_staff:
+        return HttpResponseForbidden()
+
+    questions = Question.objects.filter(question_type='TEXT').select_related('quiz_set').annotate(
+        answer_count=Count('useranswer'),
+        ungraded_count=Count('useranswer', filter=Q(useranswer__grade__isnull=True)),
+    ).order_by('-ungraded_count', 'quiz_set__title', 'id')
+    return render(request, 'grading_questions.html', {'questions': questions})
+
+
+@login_required
+def grade_question_view(request, question_id):
+    if not request.user.is_staff:
+        return HttpResponseForbidden()
+
+    question = get_object_or_404(Question.objects.select_related('quiz_set'), id=question_id, question_type='TEXT')
+
+    if request.method == 'POST':
+        grades = {}
+        for key, value in request.POST.items():
+            # A blank input is an answer the grader has not looked at yet;
+            # it stays ungraded and in the queue.
+            if key.startswith('grade_') and key[6:].isdigit() and value.strip():
+                try:
+                    grades[int(key[6:])] = min(max(float(value), 0), 100)
+                except ValueError:
+                    pass  # ignore invalid input
+
+        graded = list(UserAnswer.objects.filter(question=question, id__in=grades).only('id', 'quiz_result_id'))
+        for answer in graded:
+            answer.grade = grades[answer.id]
+        # One UPDATE for the page and one summary refresh for every attempt on it
+        UserAnswer.objects.bulk_update(graded, ['grade'])
+        result_ids = {answer.quiz_result_id for answer in graded}
+        refresh_summaries(result_ids)
+        for result_id in result_ids:
+            enqueue_job(UPDATE_LEADERBOARD, result_id)
+
+        cursor = request.POST.get('next', '')
+        if not cursor:
+            return redirect('grading_questions')
+        return redirect(f"{reverse('grade_question', args=[question.id])}?after={cursor}")
+
+    answers, next_cursor = grading_page(question, request.GET.get('after', ''))
+    next_url = f"{reverse('grade_question', args=[question.id])}?after={next_cursor}" if next_cursor else None
+    response = render(request, 'grade_question.html', {
+        'question': question,
+        'answers': answers,
+        'next_cursor': next_cursor,
+        'next_url': next_url,
+        'ungraded_count': UserAnswer.objects.filter(question=question, grade__isnull=True).count(),
+    })
+    if next_url:
+        # The next page does not depend on the grades posted from this one,
+        # so the browser can fetch it while the grader works.
+        response['Link'] = f'<{next_url}>; rel=prefetch'
+    return response
+
+
+# ----------------- Item Analysis -----------------
+@login_required
+def item_analysis(request):
+    if not request.user.is_staff:
+        return HttpResponseForbidden()
+
+    # Every stale quiz is rebuilt by run_worker and the refresh_item_stats
+    # command; a request only ever refreshes the one quiz it shows.
+    quizzes = QuizSet.objects.select_related('department', 'stats').order_by('department__name', 'title')
+    return render(request, 'item_analysis.html', {'quizzes': quizzes})
+
+
+@login_required
+def quiz_item_analysis(request, quiz_id):
+    if not request.user.is_staff:
+        return HttpResponseForbidden()
+
+    if request.method == 'POST':
+        get_object_or_404(QuizSet, id=quiz_id)
+        refresh_quiz(quiz_id)
+        return redirect('quiz_item_analysis', quiz_id=quiz_id)
+
+    quiz = get_object_or_404(QuizSet.objects.select_related('stats'), id=quiz_id)
+    rows = []
+    for question in quiz.questions.select_related('stats').prefetch_related('choices').order_by('id'):
+        stats = question.stats if hasattr(question, 'stats') else None
+        picks = stats.choice_counts if stats else {}
+        responses = stats.responses if stats else 0
+        rows.append({
+            'question': question,
+            'stats': stats,
+            'choices': [
+                {
+                    'choice': choice,
+                    'picks': picks.get(str(choice.id), 0),
+                    'percent': picks.get(str(choice.id), 0) * 100 / responses if responses else None,
+                }
+                for choice in question.choices.all()
+            ],
+        })
+    return render(request, 'quiz_item_analysis.html', {
+        'quiz': quiz,
+        'quiz_stats': quiz.stats if hasattr(quiz, 'stats') else None,
+        'rows': rows,
+    })
+
+
+# ----------------- Leaderboards -----------------
+LEADERBOARD_PAGE_SIZE = 50
+
+
+@login_required
+def leaderboard_view(request, scope, scope_id):
+    if not request.user.is_staff:
+        return HttpResponseForbidden()
+
+    if scope == 'quiz':
+        board = get_object_or_404(QuizSet, id=scope_id)
+        entries = QuizLeaderboardEntry.objects.filter(quiz=board)
+        title = board.title
+    else:
+        board = get_object_or_404(Department, id=scope_id)
+        entries = DepartmentLeaderboardEntry.objects.filter(department=board)
+        title = board.translated_name
+
+    # Entries are precomputed by the leaderboard module and indexed in board
+    # order, so a page is an index range read; ranks are filled in per page.
+    page = Paginator(entries.select_related('user').order_by(*RANK_ORDER), LEADERBOARD_PAGE_SIZE).get_page(
+        request.GET.get('page')
+    )
+    rank_page(entries, page)
+    return render(request, 'leaderboard.html', {'title': title, 'page': page})
+
+
+# ----------------- Search -----------------
+SEARCH_LIMIT = 20
+
+
+@login_required
+def search_view(request):
+    if not request.user.is_staff:
+        return HttpResponseForbidden()
+
+    query = request.GET.get('q', '').strip()
+    phrase = bool(request.GET.get('phrase'))
+    kinds = [kind for kind in request.GET.getlist('in') if kind in SEARCH_TARGETS] or list(SEARCH_TARGETS)
+    results = {kind: search(kind, query, phrase, SEARCH_LIMIT) for kind in kinds} if query else {}
+    return render(request, 'search.html', {
+        'query': query,
+        'phrase': phrase,
+        'kinds': kinds,
+        'questions': results.get('questions'),
+        'choices': results.get('choices'),
+        'answers': results.get('answers'),
+    })
+
+
 # ----------------- Status Change -----------------
 
 @require_POST
@@ -307,18 +589,91 @@ def change_status(request, result_id):
         result.status = new_status
 
         if new_status == "Pending":
+            cancel_job(RENDER_PDF, result.id)
             if result.pdf_file:
                 result.pdf_file.delete(save=False)
             result.pdf_file = None
-        else:
-            generate_result_pdf(result)
+            result.pdf_digest = ''
 
-        result.save()
+        result.save(update_fields=['status', 'pdf_file', 'pdf_digest'])
+        enqueue_job(UPDATE_LEADERBOARD, result.id)
+
+        if new_status != "Pending":
+            enqueue_job(RENDER_PDF, result.id)
 
     return HttpResponseRedirect(reverse('dashboard'))
 
 
+# ----------------- Exports -----------------
+def export_filters(params):
+    filters = {}
+    for key in ('department', 'quiz'):
+        if params.get(key, '').isdigit():
+            filters[key] = int(params[key])
+    for key in ('since', 'until'):
+        if params.get(key):
+            try:
+                filters[key] = parse_date(params[key])
+            except ValueError:
+                pass  # well-formed but impossible, e.g. 2024-02-30: ignored like a malformed one
+    if params.get('status') in dict(QuizResult.STATUS_CHOICES):
+        filters['status'] = params['status']
+    return filters
+
+
+@login_required
+def export_results(request):
+    if not request.user.is_staff:
+        return HttpResponseForbidden()
+
+    export_format = request.GET.get('format', 'csv')
+    if export_format not in EXPORT_FORMATS:
+        raise Http404("Unknown export format")
+    content_type, stream = EXPORT_FORMATS[export_format]
+
+    answers = request.GET.get('answers') == '1'
+    rows = tabular_rows(filter_results(**export_filters(request.GET)), answers=answers)
+
+    filename = f"{'answers' if answers else 'results'}_{timezone.now():%Y%m%d_%H%M}.{export_format}"
+    return download_response(request, stream(rows), content_type, filename)
+
+
 # ----------------- Info Page -----------------
 @login_required
 def platform_info_view(request):
     return render(request, 'platform_info.html')
+
+
+# ----------------- Health -----------------
+@never_cache
+def liveness(request):
+    return HttpResponse("ok", content_type='text/plain')
+
+
+@never_cache
+def readiness(request):
+    """200 once this process is warm and can reach the database and cache, 503 until then."""
+    checks = {}
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1")
+        checks['database'] = 'ok'
+    except DatabaseError:
+        checks['database'] = 'unavailable'
+
+    try:
+        cache.set('readiness_probe', 1, timeout=10)
+        checks['cache'] = 'ok' if cache.get('readiness_probe') == 1 else 'unavailable'
+    except Exception:
+        checks['cache'] = 'unavailable'
+
+    if not is_warm() and checks['database'] == 'ok':
+        # Outside gunicorn nothing ran the warmup hook; the first probe does it.
+        try:
+            warm_up()
+        except Exception:
+            pass
+    checks['warm'] = 'ok' if is_warm() else 'pending'
+
+    ready = all(value == 'ok' for value in checks.values())
+    return JsonResponse(checks, status=200 if ready else 503)
@@ -0,0 +1,55 @@
+import threading
+import time
+
+from django.conf import settings
+from django.template.loader import get_template
+from django.urls import reverse
+from django.utils import translation
+
+from . import images, papers, sidebar
+from .models import QuizSet
+
+# Templates on the candidate path, compiled ahead of the first request.
+WARM_TEMPLATES = [
+    'base.html', 'dashboard.html', 'department_quizzes.html',
+    'quiz_question.html', 'quiz_paper.html', 'quiz_result.html', 'question_image.html',
+]
+
+_warm = threading.Event()
+_lock = threading.Lock()
+
+
+def warm_up():
+    """Prime the caches the candidate pages read from and mark this process ready.
+
+    Loads the image catalog, compiles every quiz paper into the shared and
+    local caches, fills the department sidebar for each language and compiles
+    the templates. Returns counts and the elapsed time.
+    """
+    with _lock:
+        started = time.monotonic()
+        images.get_catalog()
+        images.catalog_tag()
+
+        quiz_ids = list(QuizSet.objects.values_list('id', flat=True))
+        for quiz_id in quiz_ids:
+            papers.get_paper(quiz_id)
+
+        for language, _ in settings.LANGUAGES:
+            with translation.override(language):
+                sidebar.get_departments()
+                reverse('dashboard')
+
+        for name in WARM_TEMPLATES:
+            get_template(name)
+
+        _warm.set()
+        return {
+            'papers': len(quiz_ids),
+            'languages': len(settings.LANGUAGES),
+            'seconds': time.monotonic() - started,
+        }
+
+
+def is_warm():
+    return _warm.is_set()
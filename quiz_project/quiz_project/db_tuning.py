@@ -0,0 +1,65 @@
+# Per-backend connection settings for DATABASES, kept out of settings.py so
+# the benchmark_answer_writes command can compare tuned and plain setups.
+# Every knob can be overridden with the environment variable named next to it.
+import os
+
+import dj_database_url
+
+
+def sqlite_database(name, tuned=True):
+    database = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': name,
+    }
+    if not tuned:
+        return database
+
+    busy_timeout = float(os.getenv('SQLITE_BUSY_TIMEOUT', 20))
+    pragmas = [
+        # Readers no longer block the writer (or each other); WAL is stored in
+        # the database file, so this only does work on the first connection.
+        'PRAGMA journal_mode=WAL',
+        # Safe with WAL: a power cut can lose the last commits, never corrupt.
+        'PRAGMA synchronous=NORMAL',
+        f"PRAGMA mmap_size={int(os.getenv('SQLITE_MMAP_SIZE', 128 * 1024 * 1024))}",
+        # Negative values are KiB, so this is a 64 MB page cache per connection.
+        f"PRAGMA cache_size=-{int(os.getenv('SQLITE_CACHE_KB', 64 * 1024))}",
+        'PRAGMA temp_store=MEMORY',
+    ]
+    database['OPTIONS'] = {
+        # Seconds a writer waits for the lock before "database is locked".
+        'timeout': busy_timeout,
+        # Take the write lock when the transaction starts; a deferred
+        # transaction that reads first and then writes cannot wait for the
+        # lock and fails straight away when another writer got there first.
+        'transaction_mode': 'IMMEDIATE',
+        'init_command': '; '.join(pragmas),
+    }
+    return database
+
+
+def postgres_database(url, tuned=True):
+    database = dj_database_url.parse(url, ssl_require=True)
+    if not tuned:
+        database['CONN_MAX_AGE'] = 600
+        return database
+
+    if os.getenv('DB_POOL', 'True') == 'True':
+        from psycopg_pool import ConnectionPool
+
+        # A psycopg connection pool per process replaces persistent
+        # connections; Django requires CONN_MAX_AGE=0 alongside it. Size
+        # max_size to the threads a worker serves requests on.
+        database['CONN_MAX_AGE'] = 0
+        database.setdefault('OPTIONS', {})['pool'] = {
+            'min_size': int(os.getenv('DB_POOL_MIN_SIZE', 2)),
+            'max_size': int(os.getenv('DB_POOL_MAX_SIZE', 10)),
+            'timeout': float(os.getenv('DB_POOL_TIMEOUT', 10)),
+            'max_idle': float(os.getenv('DB_POOL_MAX_IDLE', 300)),
+            # Drop connections the server or a proxy closed while idle.
+            'check': ConnectionPool.check_connection,
+        }
+    else:
+        database['CONN_MAX_AGE'] = int(os.getenv('DB_CONN_MAX_AGE', 600))
+        database['CONN_HEALTH_CHECKS'] = True
+    return database
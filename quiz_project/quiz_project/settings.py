@@ -1,7 +1,8 @@
 from pathlib import Path
 import os
 from dotenv import load_dotenv
-import dj_database_url
+
+from .db_tuning import postgres_database, sqlite_database
 
 # Load environment variables
 load_dotenv()
@@ -23,13 +24,14 @@ INSTALLED_APPS = [
     'django.contrib.contenttypes',
     'django.contrib.sessions',
     'django.contrib.messages',
+    'quiz_app',  # before staticfiles, so its collectstatic override wins
     'django.contrib.staticfiles',
-    'quiz_app',
 ]
 
 MIDDLEWARE = [
+    'quiz_app.instrumentation.RequestTimingMiddleware',  # no-op unless REQUEST_TIMING=True
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',  # WhiteNoise for static files
+    'quiz_app.middleware.WhiteNoiseMiddleware',  # WhiteNoise for static files, async-capable
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.locale.LocaleMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -60,21 +62,99 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'quiz_project.wsgi.application'
 
-# Database configuration: Railway PostgreSQL or local SQLite
+# Database configuration: Railway PostgreSQL or local SQLite, tuned per
+# backend in db_tuning.py (DB_TUNING=False falls back to the plain defaults)
 DATABASE_URL = os.getenv('DATABASE_URL')
+DB_TUNING = os.getenv('DB_TUNING', 'True') == 'True'
 
 if DATABASE_URL:
     DATABASES = {
-        'default': dj_database_url.config(conn_max_age=600, ssl_require=True)
+        'default': postgres_database(DATABASE_URL, tuned=DB_TUNING)
     }
 else:
     DATABASES = {
+        'default': sqlite_database(os.getenv('SQLITE_PATH', BASE_DIR / 'db.sqlite3'), tuned=DB_TUNING)
+    }
+
+# Cache: Redis shared by every worker when REDIS_URL is set, per-process memory otherwise
+REDIS_URL = os.getenv('REDIS_URL')
+
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
         'default': {
-            'ENGINE': 'django.db.backends.sqlite3',
-            'NAME': BASE_DIR / 'db.sqlite3',
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
         }
     }
 
+# Sessions: read through the shared cache when there is one. A per-process
+# memory cache would serve stale sessions across workers, so without Redis
+# they stay in the database. SESSION_ENGINE can pick any backend explicitly,
+# e.g. django.contrib.sessions.backends.cache.
+SESSION_ENGINE = os.getenv(
+    'SESSION_ENGINE',
+    'django.contrib.sessions.backends.cached_db' if REDIS_URL else 'django.contrib.sessions.backends.db',
+)
+
+# Compiled quiz papers are keyed by a version counter, so this only bounds how
+# long superseded versions linger in the shared cache.
+QUIZ_PAPER_CACHE_TIMEOUT = int(os.getenv('QUIZ_PAPER_CACHE_TIMEOUT', 60 * 60 * 24))
+
+# The department sidebar is cached per language and invalidated whenever a
+# Department changes; the timeout only bounds how long a deploy's template or
+# translation changes can take to show up in a shared cache. The version it is
+# keyed by lives in the database, so every process sees a change at once.
+SIDEBAR_CACHE_TIMEOUT = int(os.getenv('SIDEBAR_CACHE_TIMEOUT', 60 * 60))
+
+# Background jobs, processed by `python manage.py run_worker`
+JOB_WORKER_CONCURRENCY = int(os.getenv('JOB_WORKER_CONCURRENCY', 2))
+JOB_POLL_INTERVAL = float(os.getenv('JOB_POLL_INTERVAL', 2))
+JOB_MAX_ATTEMPTS = int(os.getenv('JOB_MAX_ATTEMPTS', 5))
+JOB_RETRY_BACKOFF = int(os.getenv('JOB_RETRY_BACKOFF', 10))  # seconds, doubled on every retry
+JOB_STALE_AFTER = int(os.getenv('JOB_STALE_AFTER', 600))  # requeue jobs running longer than this
+ITEM_STATS_INTERVAL = int(os.getenv('ITEM_STATS_INTERVAL', 300))  # seconds between item-analysis refreshes; 0 = off
+# A quiz with statistics is rebuilt once its new or regraded attempts reach
+# this share of the attempts already counted, or its statistics are this old.
+ITEM_STATS_MIN_CHANGE = float(os.getenv('ITEM_STATS_MIN_CHANGE', 0.05))
+ITEM_STATS_MAX_AGE = int(os.getenv('ITEM_STATS_MAX_AGE', 60 * 60))  # seconds
+
+# Processes used to render PDFs for bulk ZIP exports
+PDF_EXPORT_WORKERS = int(os.getenv('PDF_EXPORT_WORKERS', os.cpu_count() or 1))
+
+# Per-request query/timing instrumentation: adds a Server-Timing header and
+# logs one JSON line per request to `quiz_app.requests`. Requests over any
+# budget are logged as warnings; set a budget to None to disable it.
+REQUEST_TIMING = os.getenv('REQUEST_TIMING', 'False') == 'True'
+REQUEST_BUDGETS = {
+    'queries': int(os.getenv('REQUEST_BUDGET_QUERIES', 20)),
+    'duplicate_queries': int(os.getenv('REQUEST_BUDGET_DUPLICATE_QUERIES', 0)),
+    'similar_queries': int(os.getenv('REQUEST_BUDGET_SIMILAR_QUERIES', 5)),
+    'db_ms': None,
+    'total_ms': int(os.getenv('REQUEST_BUDGET_TOTAL_MS', 500)),
+}
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'quiz_app': {'handlers': ['console'], 'level': os.getenv('QUIZ_APP_LOG_LEVEL', 'INFO')},
+    },
+}
+
+# "wsgi" (gunicorn sync workers) or "asgi" (gunicorn + uvicorn workers), read
+# by gunicorn.conf.py. Under ASGI the candidate quiz pages use async views.
+SERVER_MODE = os.getenv('SERVER_MODE', 'wsgi')
+ASYNC_QUIZ_VIEWS = os.getenv('ASYNC_QUIZ_VIEWS', str(SERVER_MODE == 'asgi')) == 'True'
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -114,6 +194,10 @@ STATIC_URL = '/static/'
 STATICFILES_DIRS = [BASE_DIR / 'quiz_app' / 'static']
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 
+# Source folder of question images; the catalog and resized variants are
+# generated into its variants/ subfolder by collectstatic or refresh_image_catalog.
+QUIZ_IMAGES_DIR = BASE_DIR / 'quiz_app' / 'static' / 'quiz_images'
+
 # WhiteNoise for serving static files in production
 STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 
@@ -122,6 +206,9 @@ MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
 # Auth redirects
+# Loads the sidebar version along with the user; see quiz_app/auth.py.
+AUTHENTICATION_BACKENDS = ['quiz_app.auth.SidebarVersionBackend']
+
 LOGIN_URL = '/login/'
 LOGIN_REDIRECT_URL = '/'
 LOGOUT_REDIRECT_URL = '/login/'
@@ -3,10 +3,13 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 from django.conf.urls.i18n import i18n_patterns
+from quiz_app import views as quiz_views
 
-# Language switcher endpoint
+# Language switcher endpoint, plus the load balancer's probes (no language prefix)
 urlpatterns = [
     path('i18n/', include('django.conf.urls.i18n')),
+    path('healthz', quiz_views.liveness, name='healthz'),
+    path('readyz', quiz_views.readiness, name='readyz'),
 ]
 
 # Main URLs wrapped with language prefixes